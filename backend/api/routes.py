@@ -1,87 +1,484 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.templating import Jinja2Templates
-from sqlmodel import Session, select
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlmodel import Session, select, and_, or_
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime
 from ..models import Session as DBSession, SessionCreate
-from ..database import get_session
-from ..scoring import generate_summary
-from ..llm_service import simulate_llm_response, parse_llm_json, generate_quiz_questions
-from weasyprint import HTML
+from ..database import engine, get_session
+from ..ingest import BulkIngestor, iter_ndjson
+from ..jobs import scoring_queue
+from ..events import event_broker, stage_session_events
+from ..serialization import FastJSONResponse, session_payload_cache
+from ..research_export import EXPORT_FORMATS, iter_csv, iter_export_chunks, iter_parquet, parquet_available
+from ..raw_data import load_raw_data, load_raw_data_many, pack_session
+from ..trends import query_trends
+from ..llm_client import llm_client, LLMSaturatedError
+from ..chat_store import chat_store, ConversationBusyError
+from ..llm_service import (
+    simulate_llm_response, stream_llm_response, converse, stream_conversation,
+    parse_llm_json, FALLBACK_QUIZ_QUESTIONS,
+)
+from ..quiz_cache import quiz_cache
+from ..pdf_export import pdf_exporter
+from ..report_render import report_hash, report_renderer
+import asyncio
+import base64
+import json
 import os
 
 router = APIRouter()
-templates = Jinja2Templates(directory="backend/templates")
+
+MAX_BULK_EXPORT = 500
+# How long completion/export wait for a queued report before answering "not ready yet"
+REPORT_WAIT_SECONDS = float(os.environ.get("REPORT_WAIT_SECONDS", 3))
+# Comment lines sent on idle event streams so proxies don't close them
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("EVENTS_KEEPALIVE_SECONDS", 15))
 
 @router.post("/session", response_model=Dict[str, str])
 def create_session(session_data: SessionCreate, db: Session = Depends(get_session)):
     db_session = DBSession.from_orm(session_data)
     db.add(db_session)
+    telemetry = pack_session(db_session)
+    if telemetry is not None:
+        db.add(telemetry)
+    # Score in the background; the job is committed with the session so it can't get lost
+    scoring_queue.enqueue(db, [db_session.id])
+    stage_session_events(db, db_session, created=True)
     db.commit()
     db.refresh(db_session)
+    scoring_queue.notify()
     return {"session_id": str(db_session.id), "status": "created"}
 
+@router.post("/sessions/bulk")
+async def bulk_create_sessions(request: Request, score: bool = False, db: Session = Depends(get_session)):
+    """
+    Ingests many sessions in one request, as NDJSON (application/x-ndjson, parsed as it streams)
+    or as a JSON array. Returns a session id or an error per item, in input order.
+    With ?score=true every session is scored on the way in.
+    """
+    ingestor = BulkIngestor(db, score=score)
+    content_type = request.headers.get("content-type", "")
+    # Validation, scoring and inserts are CPU/DB work: they run in the threadpool, a batch at a
+    # time, so a large upload doesn't stall other requests (or event streams) on the event loop
+    if "ndjson" in content_type or "jsonl" in content_type:
+        batch = []
+        async for item, error in iter_ndjson(request.stream()):
+            batch.append((item, error))
+            if len(batch) >= ingestor.batch_size:
+                await run_in_threadpool(ingestor.add_many, batch)
+                batch = []
+        await run_in_threadpool(ingestor.add_many, batch)
+    else:
+        body = await request.body()
+        try:
+            items = await run_in_threadpool(json.loads, body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        await run_in_threadpool(ingestor.add_many, [(item, None) for item in items])
+    await run_in_threadpool(ingestor.flush)
+    if ingestor.queued:
+        scoring_queue.notify()
+    return ingestor.summary()
+
+def _enqueue_scoring(db: Session, session_ids: List[str]):
+    scoring_queue.enqueue(db, session_ids)
+    db.commit()
+    scoring_queue.notify()
+
+async def _wait_for_reports(db: Session, sessions: List[DBSession]) -> bool:
+    """
+    Reports are produced by the background scoring queue. Makes sure the sessions whose report
+    isn't ready yet are queued and waits briefly for them, on the event loop so no thread is
+    held while waiting. Returns whether every report is available.
+    """
+    # An empty report ({}) is a finished report, e.g. for sources with nothing to score
+    missing = [s for s in sessions if s.report is None]
+    if not missing:
+        return True
+    # Watched before enqueueing, so a job that finishes straight away isn't missed
+    watches = {s.id: scoring_queue.watch(s.id) for s in missing}
+    waits = [asyncio.ensure_future(event.wait()) for event in watches.values()]
+    try:
+        await run_in_threadpool(_enqueue_scoring, db, list(watches))
+        await asyncio.wait(waits, timeout=REPORT_WAIT_SECONDS)
+    finally:
+        for wait in waits:
+            wait.cancel()
+        for session_id, event in watches.items():
+            scoring_queue.unwatch(session_id, event)
+    await run_in_threadpool(lambda: [db.refresh(s) for s in missing])
+    return all(s.report is not None for s in sessions)
+
 @router.post("/session/{session_id}/complete")
-def complete_session(session_id: str, db: Session = Depends(get_session)):
-    session = db.get(DBSession, session_id)
+async def complete_session(session_id: str, db: Session = Depends(get_session)):
+    session = await run_in_threadpool(db.get, DBSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Generate summary
-    summary = generate_summary({
-        "source": session.source,
-        "raw_data": session.raw_data
-    })
-    
-    session.report = summary
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-    return summary
 
-@router.get("/session/{session_id}")
+    if not await _wait_for_reports(db, [session]):
+        job = await run_in_threadpool(scoring_queue.get_job, session_id)
+        return JSONResponse(status_code=202, content={"session_id": session_id, "status": job.status if job else "pending"})
+    return session.report
+
+@router.get("/session/{session_id}/scoring")
+def get_scoring_status(session_id: str):
+    job = scoring_queue.get_job(session_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No scoring job for this session")
+    return job
+
+@router.get("/session/{session_id}", response_class=FastJSONResponse)
 def get_session_details(session_id: str, db: Session = Depends(get_session)):
     session = db.get(DBSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    return session
+    # Built as a dict: assigning the merged raw_data to the ORM object would write it back
+    payload = {**session.model_dump(), "raw_data": load_raw_data(db, session)}
+    return FastJSONResponse(session_payload_cache.encode(payload))
 
-@router.get("/sessions")
+@router.get("/sessions", response_class=FastJSONResponse)
 def list_sessions(skip: int = 0, limit: int = 20, db: Session = Depends(get_session)):
     sessions = db.exec(select(DBSession).offset(skip).limit(limit)).all()
-    return sessions
+    raw_data = load_raw_data_many(db, sessions)
+    payloads = [{**session.model_dump(), "raw_data": raw} for session, raw in zip(sessions, raw_data)]
+    return FastJSONResponse(session_payload_cache.encode_list(payloads))
+
+def _llm_unavailable(e: Exception) -> HTTPException:
+    if isinstance(e, ConversationBusyError):
+        return HTTPException(status_code=409, detail="This conversation is still answering the previous message", headers={"Retry-After": "2"})
+    if isinstance(e, LLMSaturatedError):
+        return HTTPException(status_code=503, detail="Chat service is busy, please retry shortly", headers={"Retry-After": "2"})
+    return HTTPException(status_code=504, detail="Chat service timed out")
+
+def _get_conversation(payload: Dict[str, Any]):
+    conversation_id = payload.get("conversation_id")
+    if not conversation_id:
+        return chat_store.create()
+    conversation = chat_store.get(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found or expired")
+    # Checked again when the turn starts on the LLM pool; this rejects the common case up front
+    if conversation.busy:
+        raise _llm_unavailable(ConversationBusyError(conversation_id))
+    return conversation
+
+SUMMARY_COLUMNS = [
+    DBSession.id, DBSession.participant_id, DBSession.created_at, DBSession.source, DBSession.urgency,
+    DBSession.stress_label, DBSession.stress_score, DBSession.attention_score,
+    DBSession.impulsivity, DBSession.emotional_bias,
+]
+
+def _encode_cursor(created_at: datetime, session_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), session_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), session_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/sessions/summary")
+def list_session_summaries(
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    urgency: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_session),
+):
+    """
+    Lightweight session listing for the dashboard: summary columns only (no raw_data),
+    newest first, with keyset pagination. Pass the returned next_cursor to get the next page.
+    """
+    query = select(*SUMMARY_COLUMNS)
+    if urgency:
+        query = query.where(DBSession.urgency == urgency)
+    if source:
+        query = query.where(DBSession.source == source)
+    if since:
+        query = query.where(DBSession.created_at >= since)
+    if until:
+        query = query.where(DBSession.created_at < until)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            DBSession.created_at < cursor_created_at,
+            and_(DBSession.created_at == cursor_created_at, DBSession.id < cursor_id),
+        ))
+    query = query.order_by(DBSession.created_at.desc(), DBSession.id.desc()).limit(limit + 1)
+
+    rows = db.exec(query).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/sessions/triage")
+def triage_sessions(
+    urgency: str = "urgent",
+    since: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_session),
+):
+    """
+    Sessions of one urgency level, highest stress first (e.g. "all urgent sessions this week").
+    Served from the (urgency, stress_score) index without decoding any report JSON.
+    """
+    query = select(*SUMMARY_COLUMNS).where(DBSession.urgency == urgency)
+    if since:
+        query = query.where(DBSession.created_at >= since)
+    query = query.order_by(DBSession.stress_score.desc().nulls_last(), DBSession.created_at.desc()).limit(limit)
+    return [dict(row._mapping) for row in db.exec(query).all()]
+
+@router.get("/trends")
+def get_trends(
+    bucket: str = Query("week", pattern="^(day|week)$"),
+    participant_id: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_session),
+):
+    """
+    Per-day or per-week rollups of completed sessions: counts by urgency, mean stress and
+    attention, and the impulsivity distribution. Optionally for a single participant.
+    """
+    return query_trends(db, bucket, participant_id or "", since, until)
+
+TIMELINE_COLUMNS = [
+    DBSession.id, DBSession.created_at, DBSession.source, DBSession.urgency,
+    DBSession.stress_label, DBSession.stress_score, DBSession.attention_score,
+    DBSession.impulsivity, DBSession.emotional_bias,
+    DBSession.stress_delta, DBSession.attention_delta, DBSession.stress_avg, DBSession.attention_avg,
+]
+
+@router.get("/export/sessions")
+def export_sessions(
+    format: str = "csv",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: Optional[str] = None,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+):
+    """
+    Every matching session as one flat row (report scores, meta, quiz aggregates, extracted
+    chat fields) for research, as CSV or Parquet. Streamed from a database cursor chunk by
+    chunk, so exports of any size use constant memory.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export needs pyarrow installed on the server")
+
+    def rows():
+        # Its own DB session: the request's is closed before the body has been streamed
+        with Session(engine) as db:
+            chunks = iter_export_chunks(db, since, until, source, chunk_size)
+            yield from iter_parquet(chunks) if format == "parquet" else iter_csv(chunks)
+
+    media_type = "application/vnd.apache.parquet" if format == "parquet" else "text/csv"
+    headers = {"Content-Disposition": f"attachment; filename=sessions.{format}"}
+    # A sync generator: Starlette iterates it in the thread pool, off the event loop
+    return StreamingResponse(rows(), media_type=media_type, headers=headers)
+
+@router.get("/participants/{participant_id}/timeline")
+def get_participant_timeline(
+    participant_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_session),
+):
+    """
+    One participant's sessions oldest first, with the report summary fields and the
+    precomputed change since the previous scored session and rolling averages.
+    Served from the participant index; pass next_cursor to continue.
+    """
+    query = select(*TIMELINE_COLUMNS).where(DBSession.participant_id == participant_id)
+    if since:
+        query = query.where(DBSession.created_at >= since)
+    if until:
+        query = query.where(DBSession.created_at < until)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            DBSession.created_at > cursor_created_at,
+            and_(DBSession.created_at == cursor_created_at, DBSession.id > cursor_id),
+        ))
+    query = query.order_by(DBSession.created_at, DBSession.id).limit(limit + 1)
+
+    rows = db.exec(query).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["id"])
+    return {"participant_id": participant_id, "items": items, "next_cursor": next_cursor}
+
+@router.get("/events")
+async def session_events(request: Request, last_event_id: Optional[str] = None):
+    """
+    Server-sent events for dashboards: "created", "completed" and "escalated" (a session or
+    chat turned urgent), each with a compact session summary. Browsers resume automatically
+    with the Last-Event-ID header; on a "reset" event the client should re-fetch /sessions.
+    """
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+
+    async def event_stream():
+        yield "retry: 3000\n\n"
+        async for event in event_broker.subscribe(last_event_id, EVENTS_KEEPALIVE_SECONDS):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
+def _publish_escalation(response: Dict[str, Any], conversation_id: Optional[str] = None):
+    """Alerts dashboards as soon as a chat reply flags urgency, before the session is even saved."""
+    extracted = response.get("extracted_json") or {}
+    if extracted.get("urgency") == "urgent":
+        event_broker.publish("escalated", {
+            "session_id": None,
+            "conversation_id": conversation_id,
+            "red_flag": bool((extracted.get("extracted") or {}).get("red_flag")),
+        })
 
 @router.post("/llm")
-def chat_with_llm(payload: Dict[str, Any]):
-    # payload: {"messages": [...]}
-    messages = payload.get("messages", [])
-    # The service now handles both simulation and real API calls
-    response = simulate_llm_response(messages)
+async def chat_with_llm(payload: Dict[str, Any]):
+    # payload: {"message": "...", "conversation_id": "..." (omit to start one)}
+    # or the stateless form {"messages": [...]} with the full history
+    try:
+        if "message" in payload:
+            conversation = _get_conversation(payload)
+            response = await llm_client.call(converse, conversation, payload["message"])
+            _publish_escalation(response, conversation.id)
+            return {**response, "conversation_id": conversation.id}
+
+        messages = payload.get("messages", [])
+        # The service now handles both simulation and real API calls
+        response = await llm_client.call(simulate_llm_response, messages)
+    except (LLMSaturatedError, ConversationBusyError, asyncio.TimeoutError) as e:
+        raise _llm_unavailable(e)
+    _publish_escalation(response)
     return response
 
+@router.post("/llm/stream")
+async def stream_chat_with_llm(payload: Dict[str, Any]):
+    # payload: same as /llm
+    conversation = None
+    try:
+        if "message" in payload:
+            conversation = _get_conversation(payload)
+            events = llm_client.stream(stream_conversation, conversation, payload["message"])
+        else:
+            events = llm_client.stream(stream_llm_response, payload.get("messages", []))
+    except LLMSaturatedError as e:
+        raise _llm_unavailable(e)
+
+    async def event_stream():
+        try:
+            async for event in events:
+                if event["type"] == "final":
+                    if conversation is not None:
+                        event = {**event, "conversation_id": conversation.id}
+                    _publish_escalation(event, event.get("conversation_id"))
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except asyncio.TimeoutError:
+            event = {"type": "error", "content": "The response timed out. Please try again."}
+            yield f"event: error\ndata: {json.dumps(event)}\n\n"
+        except (LLMSaturatedError, ConversationBusyError):
+            # The pool filled up, or another turn started, between the checks and the first event
+            event = {"type": "error", "content": "Chat service is busy, please retry shortly."}
+            yield f"event: error\ndata: {json.dumps(event)}\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if conversation is not None:
+        headers["X-Conversation-Id"] = conversation.id
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
+@router.delete("/llm/{conversation_id}")
+def end_conversation(conversation_id: str):
+    chat_store.discard(conversation_id)
+    return {"status": "deleted"}
+
 @router.post("/quiz/generate")
 def generate_quiz(payload: Dict[str, Any]):
     # payload: {"context": "optional context string"}
+    # Served from the pre-generated pool; a cold context gets the static set while it warms up
     context = payload.get("context", "")
-    questions = generate_quiz_questions(context)
-    return questions
+    questions = quiz_cache.get(context)
+    return questions if questions else FALLBACK_QUIZ_QUESTIONS
+
+async def _require_reports(db: Session, sessions: List[DBSession]):
+    if not await _wait_for_reports(db, sessions):
+        pending = ", ".join(s.id for s in sessions if s.report is None)
+        raise HTTPException(status_code=409, detail=f"Report still being generated for session {pending}", headers={"Retry-After": "2"})
+
+def _report_html(session: DBSession) -> str:
+    html_content, _ = report_renderer.render(session)
+    return html_content
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match calls for
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+@router.get("/session/{session_id}/report.html")
+async def preview_session_report(session_id: str, request: Request, db: Session = Depends(get_session)):
+    """
+    The report as HTML, for previewing in the browser. Much cheaper than the PDF export:
+    clients revalidate with If-None-Match and unchanged reports come back as 304.
+    """
+    session = await run_in_threadpool(db.get, DBSession, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    await _require_reports(db, [session])
+
+    digest = report_hash(session)
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    html_content, _ = await run_in_threadpool(report_renderer.render, session, digest)
+    return Response(content=html_content, media_type="text/html", headers=headers)
 
 @router.get("/session/{session_id}/export/pdf")
-def export_session_pdf(session_id: str, db: Session = Depends(get_session)):
-    session = db.get(DBSession, session_id)
+async def export_session_pdf(session_id: str, db: Session = Depends(get_session)):
+    session = await run_in_threadpool(db.get, DBSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    if not session.report:
-        # Generate report if missing
-        session.report = generate_summary({
-            "source": session.source,
-            "raw_data": session.raw_data
-        })
-        db.add(session)
-        db.commit()
-        db.refresh(session)
 
-    html_content = templates.get_template("report.html").render(session=session)
-    pdf = HTML(string=html_content).write_pdf()
-    
+    await _require_reports(db, [session])
+    html_content = await run_in_threadpool(_report_html, session)
+    pdf = await pdf_exporter.render(session_id, html_content)
     return Response(content=pdf, media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename=session_{session_id}.pdf"})
+
+@router.post("/sessions/export/pdf")
+async def export_sessions_pdf_zip(payload: Dict[str, Any], db: Session = Depends(get_session)):
+    # payload: {"session_ids": [...]}
+    session_ids = list(dict.fromkeys(payload.get("session_ids", [])))
+    if not session_ids:
+        raise HTTPException(status_code=400, detail="session_ids is required")
+    if len(session_ids) > MAX_BULK_EXPORT:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_EXPORT} sessions per export")
+
+    sessions = await run_in_threadpool(lambda: db.exec(select(DBSession).where(DBSession.id.in_(session_ids))).all())
+    missing = set(session_ids) - {s.id for s in sessions}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Sessions not found: {', '.join(sorted(missing))}")
+
+    await _require_reports(db, sessions)
+    documents = await run_in_threadpool(lambda: {s.id: _report_html(s) for s in sessions})
+    archive = await pdf_exporter.render_zip(documents)
+    return Response(content=archive, media_type="application/zip", headers={"Content-Disposition": "attachment; filename=sessions.zip"})
@@ -0,0 +1,160 @@
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlmodel import Session, select, update
+
+from .events import session_event_data, stage_event
+from .models import Session as DBSession, report_columns, report_urgency
+from .raw_data import load_raw_data_many
+from .scoring import get_emotional_bias
+
+def quiz_arrays(quizzes: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Loads the quiz telemetry of many sessions into arrays, one row per session.
+    Reaction times are padded with NaN to the longest series.
+    """
+    n = len(quizzes)
+    rt_lists = [q.get("reaction", {}).get("reaction_times", []) for q in quizzes]
+    rt_counts = np.fromiter((len(r) for r in rt_lists), dtype=np.int64, count=n)
+    width = int(rt_counts.max()) if n else 0
+
+    reaction_times = np.full((n, width), np.nan)
+    reaction_times[np.arange(width) < rt_counts[:, None]] = np.fromiter(
+        chain.from_iterable(rt_lists), dtype=np.float64, count=int(rt_counts.sum())
+    )
+
+    choice_lists = [q.get("decision", {}).get("choices", []) for q in quizzes]
+    return {
+        "reaction_times": reaction_times,
+        "rt_counts": rt_counts,
+        "misses": np.fromiter((q.get("reaction", {}).get("misses", 0) for q in quizzes), dtype=np.float64, count=n),
+        "negative_confusions": np.fromiter(
+            (q.get("emotion_sort", {}).get("negative_confusions", 0) for q in quizzes), dtype=np.float64, count=n
+        ),
+        "choice_counts": np.fromiter((len(c) for c in choice_lists), dtype=np.int64, count=n),
+        "impulsive_counts": np.fromiter((c.count("impulsive") for c in choice_lists), dtype=np.int64, count=n),
+    }
+
+def score_quiz_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_stress_score, calculate_attention_score, get_impulsivity_label
+    and the stress label mapping from generate_summary. The thresholds and the order of the
+    additions match the per-session code so both paths produce the same floats.
+    """
+    rts = arrays["reaction_times"]
+    rt_counts = arrays["rt_counts"]
+    misses = arrays["misses"]
+    has_rts = rt_counts > 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_rt = np.where(has_rts, np.nansum(rts, axis=1) / rt_counts, 0.0)
+        # Sample standard deviation, as statistics.stdev
+        squared_dev = np.nansum((rts - mean_rt[:, None]) ** 2, axis=1)
+        std_rt = np.where(rt_counts > 1, np.sqrt(squared_dev / (rt_counts - 1)), 0.0)
+        total_trials = rt_counts + misses
+        miss_rate = np.where(total_trials > 0, misses / total_trials, 0.0)
+        impulsive_prop = np.where(
+            arrays["choice_counts"] > 0, arrays["impulsive_counts"] / arrays["choice_counts"], 0.0
+        )
+
+    stress = np.full(len(rt_counts), 0.3)
+    stress = stress + np.where(mean_rt > 450, 0.2, 0.0)
+    stress = stress + np.where(miss_rate > 0.1, 0.15, 0.0)
+    stress = stress + np.where(arrays["negative_confusions"] > 0.2, 0.2, 0.0)
+    stress = stress + np.where(impulsive_prop > 0.5, 0.2, 0.0)
+    stress = np.minimum(np.maximum(stress, 0.0), 1.0)
+
+    attention = 100 - (mean_rt / 10) - (std_rt / 2) - (misses * 10)
+    attention = np.where(has_rts, np.minimum(np.maximum(attention, 0.0), 100.0), 0.0)
+
+    impulsivity = np.select(
+        [arrays["choice_counts"] == 0, impulsive_prop > 0.5, impulsive_prop >= 0.25],
+        ["Unknown", "High", "Moderate"],
+        default="Low",
+    )
+    stress_label = np.select([stress < 0.33, stress < 0.66], ["Low", "Moderate"], default="High")
+
+    return {
+        "stress_score": stress,
+        "attention_score": attention,
+        "impulsivity": impulsivity,
+        "stress_label": stress_label,
+    }
+
+def score_sessions(sessions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Batch equivalent of scoring.generate_summary for a list of {"source", "raw_data"} dicts.
+    Returns the summaries in the same order and with the same keys.
+    """
+    summaries: List[Dict[str, Any]] = [{} for _ in sessions]
+
+    quiz_idx = [i for i, s in enumerate(sessions) if s.get("source") in ["quiz", "both"]]
+    if quiz_idx:
+        raws = [sessions[i].get("raw_data", {}) for i in quiz_idx]
+        quizzes = [raw.get("quiz", {}) for raw in raws]
+        scores = score_quiz_arrays(quiz_arrays(quizzes))
+        for row, (i, raw, quiz) in enumerate(zip(quiz_idx, raws, quizzes)):
+            summaries[i]["stress_score"] = float(scores["stress_score"][row])
+            summaries[i]["attention_score"] = float(scores["attention_score"][row])
+            summaries[i]["impulsivity"] = str(scores["impulsivity"][row])
+            summaries[i]["emotional_bias"] = get_emotional_bias(quiz, raw.get("chat_transcript", []))
+            summaries[i]["stress_label"] = str(scores["stress_label"][row])
+
+    for i, s in enumerate(sessions):
+        if s.get("source") in ["chat", "both"]:
+            llm_data = s.get("raw_data", {}).get("llm_extracted", {})
+            summaries[i]["clinical_notes"] = llm_data
+            if llm_data.get("red_flag"):
+                summaries[i]["urgency"] = "urgent"
+
+    return summaries
+
+def rescore_all_sessions(
+    db: Session,
+    chunk_size: int = 500,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Re-scores every stored session in chunks of chunk_size and writes `report` back with one
+    bulk UPDATE per chunk. Urgency follows Session.apply_report, and sessions that become
+    urgent send an escalated event with their chunk's commit. Returns the number of sessions re-scored.
+    """
+    total = 0
+    last_id = None
+    while True:
+        query = (
+            select(
+                DBSession.id, DBSession.participant_id, DBSession.created_at, DBSession.source,
+                DBSession.urgency, DBSession.raw_data,
+            )
+            .order_by(DBSession.id)
+            .limit(chunk_size)
+        )
+        if last_id is not None:
+            query = query.where(DBSession.id > last_id)
+        rows = db.exec(query).all()
+        if not rows:
+            break
+
+        raw_data = load_raw_data_many(db, rows)
+        summaries = score_sessions([{"source": r.source, "raw_data": raw} for r, raw in zip(rows, raw_data)])
+        params = []
+        for r, summary in zip(rows, summaries):
+            urgency = report_urgency(r.urgency, summary)
+            params.append({"id": r.id, "report": summary, "urgency": urgency, **report_columns(summary)})
+            if urgency == "urgent" and r.urgency != "urgent":
+                # Not added to the DB session: only describes the row as updated, for the event
+                updated = DBSession(
+                    id=r.id, participant_id=r.participant_id, created_at=r.created_at, source=r.source,
+                    urgency=urgency, **report_columns(summary),
+                )
+                stage_event(db, "escalated", session_event_data(updated))
+        db.exec(update(DBSession), params=params)
+        db.commit()
+
+        total += len(rows)
+        last_id = rows[-1].id
+        if progress:
+            progress(total)
+    return total
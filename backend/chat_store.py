@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+class ConversationBusyError(Exception):
+    """Raised when a conversation already has a turn in progress."""
+
+class Conversation:
+    """
+    Server-side state for one chat: the message list used by the fallback logic and,
+    when Gemini is available, the live ChatSession so history isn't replayed every turn.
+    """
+
+    def __init__(self, conversation_id: str, max_messages: int, messages: Optional[List[Dict[str, str]]] = None):
+        self.id = conversation_id
+        self.max_messages = max_messages
+        self.messages: List[Dict[str, str]] = []
+        self.chat: Any = None
+        self.last_access = time.monotonic()
+        # Held for a whole turn, including one still running after its caller timed out
+        self._turn = threading.Lock()
+        for m in messages or []:
+            self.append(m)
+
+    @property
+    def busy(self) -> bool:
+        return self._turn.locked()
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """
+        Holds the conversation for one turn. Raises ConversationBusyError instead of waiting if
+        another turn is in progress, so overlapping requests can't interleave their messages.
+        """
+        if not self._turn.acquire(blocking=False):
+            raise ConversationBusyError(f"Conversation {self.id} is still answering the previous message")
+        try:
+            yield
+        finally:
+            self._turn.release()
+
+    def append(self, message: Dict[str, str]):
+        self.messages.append({"role": message["role"], "content": message["content"]})
+        if len(self.messages) > self.max_messages:
+            # Compact: keep the most recent turns, starting on a user message as Gemini expects
+            keep = self.messages[-self.max_messages:]
+            while keep and keep[0]["role"] != "user":
+                keep = keep[1:]
+            self.messages = keep
+            # The live chat still holds the old history; rebuild it from the compacted one
+            self.chat = None
+
+    def sync_chat(self):
+        """Drops the live chat if it no longer mirrors self.messages (fallback or red-flag replies)."""
+        history = getattr(self.chat, "history", None)
+        if history is not None and len(history) != len(self.messages):
+            self.chat = None
+
+class ChatStore:
+    """
+    In-memory conversation store keyed by conversation id.
+    Idle conversations expire after ttl_seconds; past max_conversations the least recently
+    used one is evicted. Each conversation keeps at most max_messages messages.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800, max_conversations: int = 1000, max_messages: int = 40):
+        self.ttl_seconds = ttl_seconds
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ChatStore":
+        return cls(
+            ttl_seconds=float(os.environ.get("CHAT_SESSION_TTL_SECONDS", 1800)),
+            max_conversations=int(os.environ.get("CHAT_SESSION_MAX", 1000)),
+            max_messages=int(os.environ.get("CHAT_SESSION_MAX_MESSAGES", 40)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def _evict(self, now: float):
+        # Conversations are kept in access order, so expired ones are at the front
+        while self._conversations:
+            oldest = next(iter(self._conversations.values()))
+            if now - oldest.last_access < self.ttl_seconds and len(self._conversations) <= self.max_conversations:
+                break
+            self._conversations.popitem(last=False)
+
+    def create(self, messages: Optional[List[Dict[str, str]]] = None) -> Conversation:
+        conversation = Conversation(uuid.uuid4().hex, self.max_messages, messages)
+        with self._lock:
+            self._conversations[conversation.id] = conversation
+            self._evict(conversation.last_access)
+        return conversation
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            conversation = self._conversations.get(conversation_id)
+            if conversation is not None:
+                conversation.last_access = now
+                self._conversations.move_to_end(conversation_id)
+            return conversation
+
+    def discard(self, conversation_id: str):
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+chat_store = ChatStore.from_env()
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .metrics import LLM_BREAKER_STATE, LLM_BREAKER_TRANSITIONS
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent calls to a backend and stops sending it traffic while it is
+    unhealthy, so callers fall back immediately instead of each waiting for their own timeout.
+    - closed: calls go through. Trips to open when, over the last `window` calls (at least
+      `min_calls`), the error rate reaches `error_rate` or the share of calls slower than
+      `slow_call_seconds` reaches `slow_rate`.
+    - open: allow() is False. Once `open_seconds` have passed, one background thread runs
+      `probe` (half-open) while regular calls keep falling back.
+    - A successful probe closes the breaker; a failed one re-opens it for twice as long,
+      up to `max_open_seconds`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 8.0,
+        slow_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        probe: Optional[Callable[[], None]] = None,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe = probe
+        self.state = CLOSED
+        # (failed, slow) per call
+        self._outcomes = deque(maxlen=window)
+        self._open_until = 0.0
+        self._open_for = open_seconds
+        self._lock = threading.Lock()
+        LLM_BREAKER_STATE.set(0, backend=name)
+
+    @classmethod
+    def from_env(cls, name: str, probe: Optional[Callable[[], None]] = None) -> "CircuitBreaker":
+        return cls(
+            name,
+            window=int(os.environ.get("LLM_BREAKER_WINDOW", 20)),
+            min_calls=int(os.environ.get("LLM_BREAKER_MIN_CALLS", 5)),
+            error_rate=float(os.environ.get("LLM_BREAKER_ERROR_RATE", 0.5)),
+            slow_call_seconds=float(os.environ.get("LLM_BREAKER_SLOW_CALL_SECONDS", 8)),
+            slow_rate=float(os.environ.get("LLM_BREAKER_SLOW_RATE", 0.8)),
+            open_seconds=float(os.environ.get("LLM_BREAKER_OPEN_SECONDS", 30)),
+            probe=probe,
+        )
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self._open_until:
+                self._set_state(HALF_OPEN)
+                if self.probe is not None:
+                    threading.Thread(target=self._run_probe, name=f"{self.name}-probe", daemon=True).start()
+                else:
+                    # Without a probe, let the next real call find out
+                    return True
+            return False
+
+    def record_success(self, duration: float = 0.0):
+        self._record(False, duration >= self.slow_call_seconds)
+
+    def record_failure(self):
+        self._record(True, False)
+
+    def _record(self, failed: bool, slow: bool):
+        with self._lock:
+            if self.state == HALF_OPEN and self.probe is None:
+                # The trial call decides
+                if failed:
+                    self._open()
+                else:
+                    self._close()
+                return
+            if self.state != CLOSED:
+                return
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slow_calls = sum(1 for _, s in self._outcomes if s)
+            if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_rate:
+                print(f"Circuit breaker {self.name} opened: {failures}/{calls} failed, {slow_calls}/{calls} slow")
+                self._open()
+
+    def _run_probe(self):
+        try:
+            self.probe()
+        except Exception as e:
+            with self._lock:
+                self._open_for = min(self._open_for * 2, self.max_open_seconds)
+                self._open()
+            print(f"Circuit breaker {self.name} probe failed, staying open for {self._open_for:.0f}s: {e}")
+            return
+        with self._lock:
+            self._close()
+        print(f"Circuit breaker {self.name} closed")
+
+    def _open(self):
+        self._open_until = time.monotonic() + self._open_for
+        self._set_state(OPEN)
+
+    def _close(self):
+        self._outcomes.clear()
+        self._open_for = self.open_seconds
+        self._set_state(CLOSED)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            LLM_BREAKER_TRANSITIONS.inc(backend=self.name, state=state)
+        self.state = state
+        LLM_BREAKER_STATE.set(_STATE_VALUES[state], backend=self.name)
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session as OrmSession
+
+from .models import Session as DBSession
+
+# Events kept for clients resuming with Last-Event-ID
+EVENT_BUFFER_SIZE = int(os.environ.get("EVENT_BUFFER_SIZE", 1000))
+# Events a slow client may fall behind by before it is disconnected (it then resumes from the buffer)
+EVENT_QUEUE_SIZE = int(os.environ.get("EVENT_QUEUE_SIZE", 256))
+
+class _Subscriber:
+    def __init__(self, after_seq: int, queue_size: int):
+        # Events up to after_seq were replayed from the buffer and must not be delivered again
+        self.after_seq = after_seq
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        # Set when it fell too far behind: it gets what is queued, then the stream ends
+        self.closed = False
+
+class EventBroker:
+    """
+    In-process pub/sub for dashboard notifications. publish() can be called from any thread
+    (request handlers, scoring workers); delivery happens on the event loop bound at startup.
+    Recent events are kept in a ring buffer so clients can resume with Last-Event-ID.
+    Event ids are "<epoch>-<seq>", the epoch changing on every restart: a client resuming
+    from an id that isn't in the buffer (any more) gets a "reset" event and should re-fetch.
+    Only reaches clients of this process; run a single API process or put a real broker behind it.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE, queue_size: int = EVENT_QUEUE_SIZE):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers: List[_Subscriber] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._seq += 1
+            event = {"seq": self._seq, "id": f"{self.epoch}-{self._seq}", "type": event_type, "data": data}
+            self._buffer.append(event)
+            # Scheduled under the lock so events are delivered in seq order
+            if self._loop is not None and self._subscribers:
+                try:
+                    self._loop.call_soon_threadsafe(self._deliver, event)
+                except RuntimeError:
+                    # Loop closed during shutdown
+                    pass
+        return event
+
+    def _deliver(self, event: Dict[str, Any]):
+        for subscriber in list(self._subscribers):
+            if event["seq"] <= subscriber.after_seq:
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The client reconnects from the last event it got and catches up from the buffer
+                subscriber.closed = True
+                self._remove(subscriber)
+
+    def _remove(self, subscriber: _Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def _replay(self, last_event_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Buffered events after last_event_id, or a single reset event if they can't all be replayed. Holds the lock."""
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return [self._reset_event()]
+        seq = int(seq)
+        oldest = self._buffer[0]["seq"] if self._buffer else self._seq + 1
+        if seq < oldest - 1:
+            return [self._reset_event()]
+        return [e for e in self._buffer if e["seq"] > seq]
+
+    def _reset_event(self) -> Dict[str, Any]:
+        return {"seq": self._seq, "id": f"{self.epoch}-{self._seq}", "type": "reset", "data": {}}
+
+    async def subscribe(self, last_event_id: Optional[str] = None, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yields buffered events after last_event_id, then live ones. Yields None every
+        `keepalive` seconds without events, so the caller can keep the connection open.
+        Ends if the subscriber falls too far behind.
+        """
+        with self._lock:
+            replay = self._replay(last_event_id)
+            subscriber = _Subscriber(self._seq, self.queue_size)
+            self._subscribers.append(subscriber)
+        try:
+            for event in replay:
+                yield event
+            while True:
+                if subscriber.closed and subscriber.queue.empty():
+                    return
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+        finally:
+            self._remove(subscriber)
+
+event_broker = EventBroker()
+
+def session_event_data(session: DBSession) -> Dict[str, Any]:
+    """The compact session summary sent with session events."""
+    created_at = session.created_at
+    return {
+        "session_id": session.id,
+        "participant_id": session.participant_id,
+        "source": session.source,
+        "urgency": session.urgency,
+        "stress_label": session.stress_label,
+        "stress_score": session.stress_score,
+        "attention_score": session.attention_score,
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+    }
+
+def stage_event(db: OrmSession, event_type: str, data: Dict[str, Any]):
+    """Publishes an event once the DB session commits; dropped if it rolls back."""
+    db.info.setdefault("staged_events", []).append((event_type, data))
+
+def stage_session_events(db: OrmSession, session: DBSession, created: bool = False, completed: bool = False, old_urgency: Optional[str] = None):
+    """Stages created/completed events for a session, and escalated if it just became urgent."""
+    data = session_event_data(session)
+    if created:
+        stage_event(db, "created", data)
+    if completed:
+        stage_event(db, "completed", data)
+    if session.urgency == "urgent" and old_urgency != "urgent":
+        stage_event(db, "escalated", data)
+
+@sa_event.listens_for(OrmSession, "after_commit")
+def _publish_staged(db: OrmSession):
+    for event_type, data in db.info.pop("staged_events", []):
+        event_broker.publish(event_type, data)
+
+@sa_event.listens_for(OrmSession, "after_rollback")
+def _drop_staged(db: OrmSession):
+    db.info.pop("staged_events", None)
@@ -0,0 +1,246 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from .lexicon import NEGATIVE_LEXICON, RED_FLAG_LEXICON
+from .llm_service import generate_model_extractions, get_gemini_model
+from .models import Session as DBSession
+from .raw_data import load_raw_data
+from .scoring import generate_summary
+from .session_reports import save_report
+
+# Transcripts per LLM request, and a cap on their combined length
+EXTRACTION_BATCH_SIZE = int(os.environ.get("EXTRACTION_BATCH_SIZE", 8))
+EXTRACTION_BATCH_CHARS = int(os.environ.get("EXTRACTION_BATCH_CHARS", 12000))
+# LLM requests in flight at once
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", 4))
+
+MOOD_TONES = ["positive", "neutral", "negative"]
+# raw_data["llm_extracted"] is complete once these are set (sleep_hours and main_stressor are optional)
+REQUIRED_FIELDS = ["mood_word", "mood_tone", "red_flag"]
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, str) and value.strip():
+        return value.strip()[:80]
+    return None
+
+def _sleep_hours(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value if 0 <= value <= 24 else None
+
+def validate_extraction(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Checks an extraction against the llm_extracted schema. Fields with a wrong type or value
+    are dropped; returns None if nothing valid is left.
+    """
+    if not isinstance(data, dict):
+        return None
+    tone = data.get("mood_tone")
+    validated = {
+        "mood_word": _text(data.get("mood_word")),
+        "mood_tone": tone.lower() if isinstance(tone, str) and tone.lower() in MOOD_TONES else None,
+        "sleep_hours": _sleep_hours(data.get("sleep_hours")),
+        "main_stressor": _text(data.get("main_stressor")),
+        "red_flag": data.get("red_flag") if isinstance(data.get("red_flag"), bool) else None,
+    }
+    validated = {k: v for k, v in validated.items() if v is not None}
+    return validated or None
+
+def transcript_messages(raw_data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(role, text) pairs of a stored chat, whichever shape it was saved in."""
+    messages = raw_data.get("chat_transcript") or raw_data.get("messages") or []
+    pairs = []
+    for m in messages:
+        if not isinstance(m, dict):
+            continue
+        text = m.get("text") or m.get("content")
+        if isinstance(text, str) and text.strip():
+            pairs.append((m.get("role") or "user", text.strip()))
+    return pairs
+
+def needs_extraction(raw_data: Dict[str, Any]) -> bool:
+    extracted = raw_data.get("llm_extracted") or {}
+    if all(extracted.get(field) is not None for field in REQUIRED_FIELDS):
+        return False
+    return any(role == "user" for role, _ in transcript_messages(raw_data))
+
+_MOOD_WORDS = {
+    "great": "positive", "good": "positive", "fine": "positive", "happy": "positive", "awesome": "positive",
+    "okay": "neutral", "ok": "neutral", "alright": "neutral", "meh": "neutral", "tired": "neutral",
+    "rough": "negative", "bad": "negative", "sad": "negative", "angry": "negative", "stressed": "negative",
+    "anxious": "negative", "awful": "negative", "terrible": "negative",
+}
+_MOOD_REGEX = re.compile(rf"\b({'|'.join(_MOOD_WORDS)})\b", re.IGNORECASE)
+_SLEEP_REGEX = re.compile(r"\b(\d{1,2}(?:\.\d)?)\s*(?:hours?|hrs?|h)\b", re.IGNORECASE)
+_STRESSORS = ["exams", "school", "homework", "family", "parents", "friends", "sleep", "sports", "work"]
+_STRESSOR_REGEX = re.compile(rf"\b({'|'.join(_STRESSORS)})\b", re.IGNORECASE)
+
+def local_extract(messages: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Keyword-based extraction used without an API key or when the model fails. Deterministic,
+    so re-running a backfill gives the same result.
+    """
+    user_texts = [text for role, text in messages if role == "user"]
+    joined = "\n".join(user_texts)
+    extracted: Dict[str, Any] = {"red_flag": RED_FLAG_LEXICON.contains(joined)}
+
+    mood = _MOOD_REGEX.search(joined)
+    if mood:
+        extracted["mood_word"] = mood.group(1).lower()
+    if extracted["red_flag"] or NEGATIVE_LEXICON.contains(joined):
+        extracted["mood_tone"] = "negative"
+    else:
+        extracted["mood_tone"] = _MOOD_WORDS[extracted["mood_word"]] if mood else "neutral"
+
+    sleep = _SLEEP_REGEX.search(joined)
+    if sleep:
+        extracted["sleep_hours"] = _sleep_hours(float(sleep.group(1)))
+    stressor = _STRESSOR_REGEX.search(joined)
+    if stressor:
+        extracted["main_stressor"] = stressor.group(1).lower()
+    return validate_extraction(extracted)
+
+EXTRACTION_PROMPT = """You extract structured intake fields from teen check-in chat transcripts.
+For EVERY transcript below, identified by the id after ###, return these fields:
+- mood_word: one word for how they said they feel
+- mood_tone: "positive", "neutral" or "negative"
+- sleep_hours: number of hours they said they sleep, or null
+- main_stressor: a short phrase, or null
+- red_flag: true if they mention self-harm, suicide or being in danger, else false
+Output strictly valid JSON: one object mapping each id to its fields, e.g.
+{{"id1": {{"mood_word": "tired", "mood_tone": "neutral", "sleep_hours": 6, "main_stressor": "exams", "red_flag": false}}}}
+
+Transcripts to extract:
+{transcripts}"""
+
+def build_batch_prompt(batch: List[Tuple[str, List[Tuple[str, str]]]]) -> str:
+    transcripts = "\n\n".join(
+        f"### {session_id}\n" + "\n".join(f"{role}: {text}" for role, text in messages)
+        for session_id, messages in batch
+    )
+    return EXTRACTION_PROMPT.format(transcripts=transcripts)
+
+def pack_batches(
+    items: List[Tuple[str, List[Tuple[str, str]]]],
+    batch_size: int = EXTRACTION_BATCH_SIZE,
+    max_chars: int = EXTRACTION_BATCH_CHARS,
+) -> List[List[Tuple[str, List[Tuple[str, str]]]]]:
+    """Groups transcripts into requests of at most batch_size transcripts and about max_chars characters."""
+    batches, current, size = [], [], 0
+    for item in items:
+        length = sum(len(text) for _, text in item[1])
+        if current and (len(current) >= batch_size or size + length > max_chars):
+            batches.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+def extract_batch(batch: List[Tuple[str, List[Tuple[str, str]]]], use_model: bool = True) -> Dict[str, Tuple[Dict[str, Any], str]]:
+    """
+    Extracts one packed batch: {session_id: (fields, "model" or "local")}. Transcripts the
+    model skipped or answered invalidly for are extracted locally.
+    """
+    answers = generate_model_extractions(build_batch_prompt(batch)) if use_model else None
+    if not isinstance(answers, dict):
+        answers = {}
+    results = {}
+    for session_id, messages in batch:
+        validated = validate_extraction(answers.get(session_id))
+        if validated is not None:
+            results[session_id] = (validated, "model")
+        else:
+            results[session_id] = (local_extract(messages) or {}, "local")
+    return results
+
+class Checkpoint:
+    """Where a re-extraction run got to, persisted as JSON so an interrupted run can resume."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self.last_id: Optional[str] = None
+        self.counts: Dict[str, int] = {"scanned": 0, "model": 0, "local": 0}
+        if self.path and self.path.exists():
+            state = json.loads(self.path.read_text())
+            self.last_id = state.get("last_id")
+            self.counts.update(state.get("counts", {}))
+
+    def save(self, last_id: str):
+        self.last_id = last_id
+        if self.path is None:
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "last_id": last_id, "counts": self.counts, "updated_at": datetime.utcnow().isoformat(),
+        }))
+        tmp_path.replace(self.path)
+
+def reextract_chats(
+    db: Session,
+    checkpoint: Checkpoint,
+    chunk_size: int = 200,
+    batch_size: int = EXTRACTION_BATCH_SIZE,
+    workers: int = EXTRACTION_WORKERS,
+    use_model: Optional[bool] = None,
+    limit: Optional[int] = None,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Fills in missing llm_extracted fields of stored chat sessions and re-scores them.
+    Sessions are scanned in id order chunk_size at a time; the chunk's transcripts are packed
+    into batch requests run on `workers` threads, then written back through save_report in
+    one commit, after which the checkpoint advances. Existing extracted values are kept.
+    Archived sessions are skipped. Returns the checkpoint's counts.
+    """
+    if use_model is None:
+        use_model = get_gemini_model() is not None
+    updated = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as pool:
+        while limit is None or updated < limit:
+            query = (
+                select(DBSession)
+                .where(DBSession.source.in_(["chat", "both"]), DBSession.raw_data_archived_at.is_(None))
+                .order_by(DBSession.id)
+                .limit(chunk_size)
+            )
+            if checkpoint.last_id is not None:
+                query = query.where(DBSession.id > checkpoint.last_id)
+            sessions = db.exec(query).all()
+            if not sessions:
+                break
+
+            pending = {s.id: s for s in sessions if needs_extraction(s.raw_data)}
+            last_id = sessions[-1].id
+            if limit is not None and len(pending) >= limit - updated:
+                # Stop right after the last session updated, so the next run continues from there
+                pending = dict(list(pending.items())[:limit - updated])
+                last_id = list(pending)[-1]
+            items = [(sid, transcript_messages(s.raw_data)) for sid, s in pending.items()]
+            results: Dict[str, Tuple[Dict[str, Any], str]] = {}
+            for batch_results in pool.map(lambda b: extract_batch(b, use_model), pack_batches(items, batch_size)):
+                results.update(batch_results)
+
+            for session_id, (fields, source) in results.items():
+                session = pending[session_id]
+                existing = session.raw_data.get("llm_extracted") or {}
+                merged = {**fields, **{k: v for k, v in existing.items() if v is not None}}
+                session.raw_data = {**session.raw_data, "llm_extracted": merged}
+                save_report(db, session, generate_summary({"source": session.source, "raw_data": load_raw_data(db, session)}))
+                checkpoint.counts[source] += 1
+            db.commit()
+
+            updated += len(results)
+            checkpoint.counts["scanned"] += len(sessions)
+            checkpoint.save(last_id)
+            if progress:
+                progress(checkpoint.counts)
+    return checkpoint.counts
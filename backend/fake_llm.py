@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+class FakeLLMError(Exception):
+    """Simulated Gemini failure; like google.api_core errors it carries the HTTP status as .code."""
+
+    def __init__(self, message: str, code: int = 503):
+        super().__init__(message)
+        self.code = code
+
+class FakeUsage:
+    def __init__(self, prompt: str, reply: str):
+        self.prompt_token_count = len(prompt.split())
+        self.candidates_token_count = len(reply.split())
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+class FakeResponse:
+    """Mimics the parts of a google.generativeai response the service reads."""
+
+    def __init__(self, text: str, prompt: str = "", chunks: Optional[List[str]] = None, delay: float = 0.0):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt, text)
+        self._chunks = chunks
+        self._delay = delay
+
+    def __iter__(self) -> Iterator["FakeResponse"]:
+        for chunk in self._chunks or [self.text]:
+            time.sleep(self._delay)
+            yield FakeResponse(chunk)
+
+FAKE_REPLIES = [
+    "I hear you. Tell me a bit more about that?",
+    "That sounds important. How does that make you feel?",
+    "Thanks for telling me. What has been on your mind the most this week?",
+    "It's okay to feel that way. How have you been sleeping lately?",
+]
+
+FAKE_COMPLETION = {
+    "intent": "complete",
+    "extracted": {
+        "mood_word": "okay",
+        "mood_tone": "neutral",
+        "sleep_hours": 7,
+        "main_stressor": "school",
+        "red_flag": False
+    },
+    "urgency": "monitor"
+}
+
+FAKE_QUIZ = [
+    {
+        "text": "Your group project partner hasn't done their part and it's due tomorrow.",
+        "options": [
+            {"label": "Message them and split what's left", "type": "Calm"},
+            {"label": "Complain about them in the group chat", "type": "Impulsive"},
+            {"label": "Hope the teacher doesn't notice", "type": "Avoidant"},
+        ],
+    },
+]
+
+class FakeChat:
+    def __init__(self, model: "FakeGeminiModel", history: List[Dict[str, Any]]):
+        self.model = model
+        self.history = list(history)
+
+    def send_message(self, content: str, stream: bool = False, request_options: Optional[Dict[str, Any]] = None, **kwargs) -> FakeResponse:
+        user_turns = sum(1 for m in self.history if m["role"] == "user") + 1
+        rng = self.model.rng(content, user_turns)
+        self.model.wait_or_fail(rng, stream, (request_options or {}).get("timeout"))
+
+        reply = rng.choice(FAKE_REPLIES)
+        if user_turns >= self.model.complete_after:
+            reply = f"Thanks for sharing all of that. Take care!\n```json\n{json.dumps(FAKE_COMPLETION)}\n```"
+        self.history.append({"role": "user", "parts": [content]})
+        self.history.append({"role": "model", "parts": [reply]})
+
+        if not stream:
+            return FakeResponse(reply, content)
+        # Split on spaces, keeping them, so the chunks concatenate back to the reply
+        words = reply.split(" ")
+        chunks = [w + " " for w in words[:-1]] + [words[-1]]
+        return FakeResponse(reply, content, chunks, self.model.chunk_delay)
+
+class FakeGeminiModel:
+    """
+    Offline stand-in for genai.GenerativeModel, for benchmarks and load tests.
+    Latency and failures are drawn from an RNG seeded with the seed, the prompt and how often
+    that prompt was sent before (so retries don't repeat the same outcome). A given
+    conversation behaves the same on every run regardless of thread scheduling.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        jitter_ms: float = 200,
+        error_rate: float = 0.0,
+        chunk_delay_ms: float = 20,
+        complete_after: int = 5,
+        seed: int = 0,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay_ms / 1000
+        self.complete_after = complete_after
+        self.seed = seed
+        self._sent: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeGeminiModel":
+        return cls(
+            latency_ms=float(os.environ.get("FAKE_LLM_LATENCY_MS", 800)),
+            jitter_ms=float(os.environ.get("FAKE_LLM_JITTER_MS", 200)),
+            error_rate=float(os.environ.get("FAKE_LLM_ERROR_RATE", 0)),
+            chunk_delay_ms=float(os.environ.get("FAKE_LLM_CHUNK_DELAY_MS", 20)),
+            seed=int(os.environ.get("FAKE_LLM_SEED", 0)),
+        )
+
+    def rng(self, prompt: str, turn: int = 0) -> random.Random:
+        key = f"{self.seed}:{turn}:{prompt}"
+        with self._lock:
+            attempt = self._sent[key] = self._sent.get(key, 0) + 1
+        digest = hashlib.sha256(f"{key}:{attempt}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def wait_or_fail(self, rng: random.Random, stream: bool = False, timeout: Optional[float] = None):
+        delay = max(0.0, rng.gauss(self.latency, self.jitter))
+        failed = rng.random() < self.error_rate
+        # Streamed replies only wait for the first token here; the rest is spread over the chunks
+        if stream:
+            delay /= 2
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise FakeLLMError("504 Deadline Exceeded (simulated)", code=504)
+        time.sleep(delay)
+        if failed:
+            raise FakeLLMError("503 The model is overloaded (simulated)")
+
+    def start_chat(self, history: Optional[List[Dict[str, Any]]] = None) -> FakeChat:
+        return FakeChat(self, history or [])
+
+    def generate_content(self, prompt: str, request_options: Optional[Dict[str, Any]] = None, **kwargs) -> FakeResponse:
+        self.wait_or_fail(self.rng(prompt), timeout=(request_options or {}).get("timeout"))
+        if "Transcripts to extract:" in prompt:
+            # Batch extraction (extraction.py): the same fields for every transcript id
+            ids = re.findall(r"^### (\S+)$", prompt, re.MULTILINE)
+            answer = {session_id: FAKE_COMPLETION["extracted"] for session_id in ids}
+            return FakeResponse(f"```json\n{json.dumps(answer)}\n```", prompt)
+        return FakeResponse(f"```json\n{json.dumps(FAKE_QUIZ)}\n```", prompt)
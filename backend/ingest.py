@@ -0,0 +1,121 @@
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlmodel import Session, insert
+
+from .events import stage_session_events
+from .models import Session as DBSession, ScoringJob, SessionCreate, SessionTelemetry
+from .raw_data import pack_session
+from .scoring import generate_summary
+from .timeline import rebuild_timelines
+from .trends import TrendDeltas
+
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", 500))
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    """
+    Parses newline-delimited JSON as it streams in, yielding (item, error) per non-empty line.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+def _parse_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+class BulkIngestor:
+    """
+    Validates sessions one at a time and inserts them in batches: one executemany INSERT and
+    one commit per batch_size valid sessions. With score=True each session is scored with
+    generate_summary before insert and the trend rollups are updated in the same commit;
+    otherwise a scoring job is inserted alongside each session.
+    """
+
+    def __init__(self, db: Session, score: bool = False, batch_size: int = BULK_BATCH_SIZE):
+        self.db = db
+        self.score = score
+        self.queued = False
+        self.batch_size = batch_size
+        self.results: List[Dict[str, Any]] = []
+        self._pending: List[Tuple[int, Dict[str, Any]]] = []
+        self._telemetry: List[Dict[str, Any]] = []
+        self._deltas = TrendDeltas()
+
+    @property
+    def full(self) -> bool:
+        return len(self._pending) >= self.batch_size
+
+    def add(self, item: Any, error: Optional[str] = None):
+        index = len(self.results)
+        if error is None:
+            try:
+                session = DBSession.from_orm(SessionCreate.model_validate(item))
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        if error is not None:
+            self.results.append({"index": index, "error": error})
+            return
+
+        if self.score:
+            try:
+                report = generate_summary({"source": session.source, "raw_data": session.raw_data})
+            except Exception as e:
+                # e.g. non-numeric reaction times; fail the item, not the upload
+                self.results.append({"index": index, "error": f"Scoring failed: {e}"})
+                return
+            session.apply_report(report)
+            self._deltas.add(session.created_at, session.participant_id, session.urgency, session.report)
+        self.results.append({"index": index, "session_id": session.id})
+        stage_session_events(self.db, session, created=True, completed=self.score)
+        telemetry = pack_session(session)
+        if telemetry is not None:
+            self._telemetry.append(telemetry.model_dump())
+        self._pending.append((index, session.model_dump()))
+
+    def add_many(self, items: List[Tuple[Any, Optional[str]]]):
+        """add() for each (item, error), flushing whenever a batch fills up. Blocking: run it off the event loop."""
+        for item, error in items:
+            self.add(item, error)
+            if self.full:
+                self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        try:
+            self.db.exec(insert(DBSession), params=[row for _, row in self._pending])
+            if self._telemetry:
+                self.db.exec(insert(SessionTelemetry), params=self._telemetry)
+            if self.score:
+                self._deltas.flush(self.db)
+                # New sessions can land anywhere in a participant's history
+                rebuild_timelines(self.db, {row["participant_id"] for _, row in self._pending})
+            else:
+                self.db.exec(insert(ScoringJob), params=[
+                    ScoringJob(session_id=row["id"]).model_dump() for _, row in self._pending
+                ])
+                self.queued = True
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            print(f"Bulk insert error: {e}")
+            for index, _ in self._pending:
+                self.results[index] = {"index": index, "error": "Database error while inserting batch"}
+        self._pending = []
+        self._telemetry = []
+        self._deltas = TrendDeltas()
+
+    def summary(self) -> Dict[str, Any]:
+        created = sum(1 for r in self.results if "session_id" in r)
+        return {"created": created, "failed": len(self.results) - created, "results": self.results}
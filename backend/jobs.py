@@ -0,0 +1,171 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, update
+
+from .database import engine
+from .models import Session as DBSession, ScoringJob
+from .raw_data import load_raw_data
+from .scoring import generate_summary
+from .session_reports import save_report
+
+class ScoringQueue:
+    """
+    In-process scoring queue backed by the ScoringJob table, so queued work survives restarts.
+    Worker threads claim pending jobs with a conditional UPDATE, score the session and store
+    the report and the job's new status in one commit. Scoring is deterministic, so running a
+    job twice (e.g. after a crash mid-job) is harmless. Failures are retried with exponential
+    backoff up to max_attempts.
+    """
+
+    def __init__(self, engine: Engine, workers: int = 2, max_attempts: int = 3, poll_interval: float = 2.0):
+        self.engine = engine
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # asyncio events of callers waiting for a session's job, with the loop each belongs to
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, engine: Engine) -> "ScoringQueue":
+        return cls(
+            engine,
+            workers=int(os.environ.get("SCORING_WORKERS", 2)),
+            max_attempts=int(os.environ.get("SCORING_MAX_ATTEMPTS", 3)),
+        )
+
+    def start(self):
+        # Jobs left running by a previous process never finished; run them again
+        with Session(self.engine) as db:
+            db.exec(update(ScoringJob).where(ScoringJob.status == "running").values(status="pending"))
+            db.commit()
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"scoring-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, db: Session, session_ids: Iterable[str]):
+        """
+        Stages a pending job for each session on the caller's DB session, so the job is
+        committed together with the session itself. Call notify() after committing.
+        """
+        now = datetime.utcnow()
+        for session_id in session_ids:
+            job = db.get(ScoringJob, session_id)
+            if job is None:
+                db.add(ScoringJob(session_id=session_id))
+            elif job.status in ("done", "failed"):
+                job.status, job.attempts, job.last_error, job.run_after, job.updated_at = "pending", 0, None, now, now
+                db.add(job)
+
+    def notify(self):
+        self._wake.set()
+
+    def watch(self, session_id: str) -> asyncio.Event:
+        """
+        Returns an asyncio event that is set when the session's job next finishes (done, failed
+        or waiting for a retry), so callers can wait on the event loop instead of holding a
+        thread. Call from the loop, before enqueueing, and unwatch() afterwards.
+        """
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters.setdefault(session_id, []).append((asyncio.get_running_loop(), event))
+        return event
+
+    def unwatch(self, session_id: str, event: asyncio.Event):
+        with self._lock:
+            waiters = [w for w in self._waiters.get(session_id, []) if w[1] is not event]
+            if waiters:
+                self._waiters[session_id] = waiters
+            else:
+                self._waiters.pop(session_id, None)
+
+    def _finished(self, session_id: str):
+        with self._lock:
+            waiters = self._waiters.pop(session_id, [])
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop closed during shutdown
+                pass
+
+    def get_job(self, session_id: str) -> Optional[ScoringJob]:
+        with Session(self.engine) as db:
+            return db.get(ScoringJob, session_id)
+
+    def _work(self):
+        while not self._stop.is_set():
+            session_id = self._claim()
+            if session_id is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(session_id)
+            self._finished(session_id)
+
+    def _claim(self) -> Optional[str]:
+        with Session(self.engine) as db:
+            candidates = db.exec(
+                select(ScoringJob.session_id)
+                .where(ScoringJob.status == "pending", ScoringJob.run_after <= datetime.utcnow())
+                .order_by(ScoringJob.run_after)
+                .limit(self.workers)
+            ).all()
+            for session_id in candidates:
+                # Only one worker (or process) can move a given job out of "pending"
+                result = db.exec(
+                    update(ScoringJob)
+                    .where(ScoringJob.session_id == session_id, ScoringJob.status == "pending")
+                    .values(status="running", updated_at=datetime.utcnow())
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    return session_id
+        return None
+
+    def _run(self, session_id: str):
+        with Session(self.engine) as db:
+            job = db.get(ScoringJob, session_id)
+            try:
+                session = db.get(DBSession, session_id)
+                if session is None:
+                    raise LookupError("Session not found")
+                save_report(db, session, generate_summary({
+                    "source": session.source,
+                    "raw_data": load_raw_data(db, session)
+                }))
+                job.status = "done"
+                job.last_error = None
+            except Exception as e:
+                db.rollback()
+                job = db.get(ScoringJob, session_id)
+                job.attempts += 1
+                job.last_error = str(e)
+                if job.attempts >= self.max_attempts or isinstance(e, LookupError):
+                    job.status = "failed"
+                else:
+                    job.status = "pending"
+                    job.run_after = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+                print(f"Scoring job {session_id} failed (attempt {job.attempts}): {e}")
+            job.updated_at = datetime.utcnow()
+            db.add(job)
+            db.commit()
+
+scoring_queue = ScoringQueue.from_env(engine)
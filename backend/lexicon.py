@@ -0,0 +1,76 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+class LexiconHit(NamedTuple):
+    term: str  # canonical lexicon term that matched
+    start: int  # offsets into the scanned text (or into the message, for transcripts)
+    end: int
+    message_index: Optional[int] = None  # index into the transcript, when scanning one
+
+class Lexicon:
+    """
+    A fixed word/phrase list compiled once into a single case-insensitive regex.
+    Terms only match on word boundaries ("cut" matches "cut", not "shortcut" or "execute"),
+    and whitespace inside a phrase matches any run of whitespace.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = tuple(terms)
+        self._canonical: Dict[str, str] = {self._normalize(t): t for t in self.terms}
+        # Longest first, so a phrase wins over a shorter term it starts with
+        alternatives = sorted(self.terms, key=len, reverse=True)
+        pattern = "|".join(r"\s+".join(re.escape(word) for word in t.split()) for t in alternatives)
+        self._regex = re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def contains(self, text: str) -> bool:
+        return self._regex.search(text) is not None
+
+    def scan(self, text: str) -> List[LexiconHit]:
+        return [
+            LexiconHit(self._canonical[self._normalize(m.group())], m.start(), m.end())
+            for m in self._regex.finditer(text)
+        ]
+
+    def scan_transcript(self, messages: List[Dict[str, str]], role: Optional[str] = "user", key: str = "content") -> List[LexiconHit]:
+        """
+        Scans every message (optionally only those from `role`) in a single regex pass.
+        Hit offsets are relative to the message they fall in.
+        """
+        indices: List[int] = []
+        starts: List[int] = []
+        texts: List[str] = []
+        offset = 0
+        for i, msg in enumerate(messages):
+            if role is not None and msg.get("role") != role:
+                continue
+            text = msg.get(key) or ""
+            indices.append(i)
+            starts.append(offset)
+            texts.append(text)
+            # Messages are joined with NUL, which is a word boundary and never part of a match
+            offset += len(text) + 1
+
+        hits = []
+        for hit in self.scan("\0".join(texts)):
+            pos = bisect_right(starts, hit.start) - 1
+            base = starts[pos]
+            hits.append(LexiconHit(hit.term, hit.start - base, hit.end - base, indices[pos]))
+        return hits
+
+# Inflections are listed explicitly since matching is whole-word; keep every form the
+# old substring check caught, minus unrelated words ("shortcut", "badge")
+RED_FLAG_LEXICON = Lexicon([
+    "suicidal", "suicidally", "kill myself", "want to die", "cut", "cuts", "cutting", "cutter",
+    "cutters", "overdose", "overdoses", "overdosed", "overdosing", "harm myself", "hopeless",
+    "hopelessly", "hopelessness", "no hope", "no hopes", "plan to",
+])
+
+NEGATIVE_LEXICON = Lexicon([
+    "sad", "sadly", "sadness", "angry", "hopeless", "hopelessly", "hopelessness", "rough",
+    "rougher", "roughest", "bad", "badly",
+])
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+class LLMSaturatedError(Exception):
+    """Raised when the LLM pool already has as much work as it is allowed to queue."""
+
+_DONE = object()
+
+class LLMClient:
+    """
+    Runs the blocking Gemini SDK calls from llm_service on a dedicated, bounded thread pool,
+    so slow LLM calls never occupy the threadpool FastAPI uses for sync endpoints.
+    - max_concurrency: number of LLM calls running at once
+    - max_queue: number of extra calls allowed to wait for a free slot before rejecting
+    - timeout: seconds a caller waits for a result (per event when streaming)
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        return cls(
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 8)),
+            max_queue=int(os.environ.get("LLM_MAX_QUEUE", 32)),
+            timeout=float(os.environ.get("LLM_TIMEOUT_SECONDS", 30)),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _check_capacity(self):
+        if self._pending >= self.max_concurrency + self.max_queue:
+            raise LLMSaturatedError("LLM service is at capacity")
+
+    def _acquire(self):
+        with self._lock:
+            self._check_capacity()
+            self._pending += 1
+
+    def _release(self, _future: Optional[Future] = None):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queues fn(*args) on the LLM pool. Raises LLMSaturatedError instead of queueing without bound."""
+        self._acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def call(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Awaits fn(*args) on the LLM pool.
+        Raises LLMSaturatedError immediately when saturated and asyncio.TimeoutError after the deadline.
+        A call that times out keeps its worker until the SDK returns, so it still counts against capacity.
+        """
+        future = self.submit(fn, *args)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+
+    def stream(self, fn: Callable[..., Iterator[Any]], *args: Any, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        Iterates the blocking generator fn(*args) on the LLM pool.
+        Saturation is checked up front, so it surfaces before a response starts. The slot itself
+        is taken when iteration begins and held until the generator is done with its worker,
+        so a stream that is never iterated holds nothing.
+        """
+        with self._lock:
+            self._check_capacity()
+        return self._iterate(fn, args, timeout or self.timeout)
+
+    async def _iterate(self, fn: Callable[..., Iterator[Any]], args: tuple, timeout: float) -> AsyncIterator[Any]:
+        self._acquire()
+        iterator = fn(*args)
+        future: Optional[Future] = None
+        try:
+            while True:
+                future = self._executor.submit(next, iterator, _DONE)
+                item = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            if future is not None and not future.done():
+                # Timed out or abandoned while a worker is still inside next(): the generator can
+                # only be closed, and the slot given back, once that call returns
+                future.add_done_callback(lambda _future: self._close(iterator))
+            else:
+                self._close(iterator)
+
+    def _close(self, iterator: Iterator[Any]):
+        try:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        except Exception as e:
+            print(f"Error closing LLM stream: {e}")
+        finally:
+            self._release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+llm_client = LLMClient.from_env()
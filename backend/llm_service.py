@@ -1,23 +1,44 @@
 import json
 import os
 import random
-from typing import Dict, Any, List
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import time
+from typing import Dict, Any, List, Iterator, Optional
+from .chat_store import Conversation
+from .circuit_breaker import CircuitBreaker
+from .lexicon import RED_FLAG_LEXICON
+from .metrics import LLM_LATENCY, LLM_RESPONSES, LLM_TOKENS
 
 # Initialize Gemini if key is present
 model = None
+# Set once the key has been looked up, so a missing key isn't re-checked (and logged) on every call
+_model_checked = False
+
+# Total time one Gemini call may take, retries included, and how often transient errors are retried
+GEMINI_DEADLINE_SECONDS = float(os.environ.get("LLM_CALL_DEADLINE_SECONDS", 10))
+GEMINI_RETRIES = int(os.environ.get("LLM_RETRIES", 2))
+GEMINI_RETRY_BASE_SECONDS = float(os.environ.get("LLM_RETRY_BASE_SECONDS", 0.5))
+# HTTP status codes worth retrying: rate limited, internal error, unavailable
+TRANSIENT_STATUS_CODES = {429, 500, 503}
 
 def get_gemini_model():
-    global model
-    if model:
+    global model, _model_checked
+    if model or _model_checked:
         return model
-    
+    _model_checked = True
+
+    # LLM_BACKEND=fake swaps in the offline stand-in used by scripts/benchmark.py
+    if os.environ.get("LLM_BACKEND") == "fake":
+        from .fake_llm import FakeGeminiModel
+        model = FakeGeminiModel.from_env()
+        return model
+
     api_key = os.environ.get("GEMINI_API_KEY")
     print(f"DEBUG: Checking for GEMINI_API_KEY... Found: {bool(api_key)}")
     
     if api_key:
         try:
+            # Imported here: the SDK is slow to import and not needed when no key is configured
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             model = genai.GenerativeModel(
                 model_name="gemini-2.0-flash",
@@ -42,15 +63,19 @@ SYSTEM_PROMPT = """You are TeenCare Intake Assistant — a warm, supportive, and
 Escalation Message (VERBATIM): "I’m really sorry you’re feeling this way. I’m not able to provide emergency help. If you are in immediate danger or thinking about harming yourself, please contact local emergency services right now, or a crisis line. If you can, tell me if you are safe right now. I will flag this session for the counselor to review immediately."
 """
 
-def simulate_llm_response(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+# Number of words per chunk when replaying a non-streamed reply over SSE
+STREAM_CHUNK_WORDS = 3
+
+def simulate_llm_response(messages: List[Dict[str, str]], conversation: Optional[Conversation] = None) -> Dict[str, Any]:
     """
     Generates an LLM response using Gemini if available, otherwise falls back to simulation.
     Returns a dict with 'content' and optional 'extracted_json'.
+    When a server-side conversation is given, its live Gemini chat is reused instead of rebuilt.
     """
     # Check for red flags (always check this first for safety)
     last_user_msg = messages[-1]["content"].lower() if messages else ""
-    red_flags = ["suicidal", "kill myself", "want to die", "cut", "overdose", "harm myself", "hopeless", "no hope", "plan to"]
-    if any(flag in last_user_msg for flag in red_flags):
+    if RED_FLAG_LEXICON.contains(last_user_msg):
+        LLM_RESPONSES.inc(source="red_flag")
         return {
             "content": "I’m really sorry you’re feeling this way. I’m not able to provide emergency help. If you are in immediate danger or thinking about harming yourself, please contact local emergency services right now, or a crisis line. If you can, tell me if you are safe right now. I will flag this session for the counselor to review immediately.",
             "extracted_json": {
@@ -60,38 +85,37 @@ def simulate_llm_response(messages: List[Dict[str, str]]) -> Dict[str, Any]:
             }
         }
 
-    # Use Gemini if available
+    # Use Gemini if available and healthy
     model = get_gemini_model()
-    if model:
+    if model and gemini_breaker.allow():
+        started = time.perf_counter()
         try:
-            # Convert OpenAI message format to Gemini chat history
-            # Gemini roles: 'user', 'model'
-            chat_history = []
-            for m in messages[:-1]: # Exclude the last message which is the new prompt
-                role = "user" if m["role"] == "user" else "model"
-                chat_history.append({"role": role, "parts": [m["content"]]})
-            
-            chat = model.start_chat(history=chat_history)
-            response = chat.send_message(messages[-1]["content"])
+            chat = _start_chat(model, messages, conversation)
+            response = _call_gemini(chat.send_message, messages[-1]["content"])
             
             content = response.text
             extracted = parse_llm_json(content)
-            
-            # Clean content if it contains JSON (remove the JSON block for display)
-            display_content = content
-            if "```json" in content:
-                display_content = content.split("```json")[0].strip()
-            elif "```" in content:
-                display_content = content.split("```")[0].strip()
 
+            LLM_LATENCY.observe(time.perf_counter() - started, operation="chat", outcome="ok")
+            _record_usage("chat", response)
+            LLM_RESPONSES.inc(source="gemini")
             return {
-                "content": display_content,
+                "content": strip_json_block(content),
                 "extracted_json": extracted if extracted else None
             }
         except Exception as e:
+            LLM_LATENCY.observe(time.perf_counter() - started, operation="chat", outcome="error")
             print(f"Gemini API Error: {e}")
             # Fallback to simulation on error
-            pass
+            if conversation is not None:
+                conversation.chat = None
+
+    LLM_RESPONSES.inc(source="fallback")
+    return _fallback_response(messages)
+
+def _fallback_response(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Canned replies used when Gemini is unavailable."""
+    last_user_msg = messages[-1]["content"].lower() if messages else ""
 
     # Fallback Simulation Logic
     turn_count = len([m for m in messages if m["role"] == "assistant"])
@@ -142,54 +166,277 @@ def simulate_llm_response(messages: List[Dict[str, str]]) -> Dict[str, Any]:
     ]
     return {"content": random.choice(generic_responses)}
 
-def generate_quiz_questions(context: str = "") -> List[Dict[str, Any]]:
+def generate_model_quiz_questions(context: str = "") -> Optional[List[Dict[str, Any]]]:
     """
-    Generates quiz questions using Gemini based on context.
-    Falls back to static questions if API is unavailable.
+    Asks Gemini for quiz questions. Returns None when the model is unavailable or its
+    output can't be used, so callers (e.g. the quiz cache) never store fallback questions.
     """
     model = get_gemini_model()
-    if model:
+    if not model or not gemini_breaker.allow():
+        return None
+    try:
+        prompt = f"""Generate 2 decision-making scenarios for a teenager. 
+        Context: {context if context else "General stress and anxiety"}.
+        Output strictly valid JSON list of objects with keys: 'text' (scenario description), 'options' (list of 3 objects with 'label' and 'type' (Calm/Impulsive/Avoidant)).
+        Example: [{{"text": "...", "options": [{{"label": "...", "type": "Calm"}}]}}]"""
+
+        started = time.perf_counter()
         try:
-            prompt = f"""Generate 2 decision-making scenarios for a teenager. 
-            Context: {context if context else "General stress and anxiety"}.
-            Output strictly valid JSON list of objects with keys: 'text' (scenario description), 'options' (list of 3 objects with 'label' and 'type' (Calm/Impulsive/Avoidant)).
-            Example: [{{"text": "...", "options": [{{"label": "...", "type": "Calm"}}]}}]"""
-            
-            response = model.generate_content(prompt)
-            content = response.text
-            
-            # Try to parse JSON from content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                return json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                return json.loads(json_str)
-            else:
-                return json.loads(content)
+            response = _call_gemini(model.generate_content, prompt)
+        except Exception:
+            LLM_LATENCY.observe(time.perf_counter() - started, operation="quiz", outcome="error")
+            raise
+        LLM_LATENCY.observe(time.perf_counter() - started, operation="quiz", outcome="ok")
+        _record_usage("quiz", response)
+        content = response.text
+
+        # Try to parse JSON from content
+        if "```json" in content:
+            json_str = content.split("```json")[1].split("```")[0].strip()
+            questions = json.loads(json_str)
+        elif "```" in content:
+            json_str = content.split("```")[1].split("```")[0].strip()
+            questions = json.loads(json_str)
+        else:
+            questions = json.loads(content)
+    except Exception as e:
+        print(f"Quiz Generation Error: {e}")
+        return None
+
+    if not isinstance(questions, list) or not all(
+        isinstance(q, dict) and "text" in q and isinstance(q.get("options"), list) for q in questions
+    ):
+        print("Quiz Generation Error: unexpected question format")
+        return None
+    return questions
+
+# Fallback Static Questions
+FALLBACK_QUIZ_QUESTIONS = [
+    {
+        "text": "You have a big test tomorrow but your friends are going out tonight.",
+        "options": [
+            { "label": "Study at home", "type": "Calm" },
+            { "label": "Go out with friends", "type": "Impulsive" },
+            { "label": "Ignore both", "type": "Avoidant" },
+        ],
+    },
+    {
+        "text": "Someone posts something mean about you online.",
+        "options": [
+            { "label": "Talk to them directly", "type": "Calm" },
+            { "label": "Post something back", "type": "Impulsive" },
+            { "label": "Pretend you didn't see it", "type": "Avoidant" },
+        ],
+    },
+]
+
+def generate_model_extractions(prompt: str) -> Optional[Any]:
+    """
+    Sends a batch extraction prompt (see extraction.py) to Gemini and returns the parsed JSON,
+    or None when the model is unavailable or didn't answer with JSON. Validation is up to the caller.
+    """
+    model = get_gemini_model()
+    if not model or not gemini_breaker.allow():
+        return None
+    started = time.perf_counter()
+    try:
+        response = _call_gemini(model.generate_content, prompt)
+    except Exception as e:
+        LLM_LATENCY.observe(time.perf_counter() - started, operation="extract", outcome="error")
+        print(f"Extraction Error: {e}")
+        return None
+    LLM_LATENCY.observe(time.perf_counter() - started, operation="extract", outcome="ok")
+    _record_usage("extract", response)
+
+    content = response.text
+    parsed = parse_llm_json(content)
+    if parsed:
+        return parsed
+    try:
+        return json.loads(content)
+    except ValueError:
+        print("Extraction Error: response was not JSON")
+        return None
+
+def _start_chat(model, messages: List[Dict[str, str]], conversation: Optional[Conversation] = None):
+    """
+    Returns a Gemini chat primed with every message but the last one.
+    Reuses the conversation's live chat when it has one, otherwise rebuilds it from the messages.
+    """
+    if conversation is not None and conversation.chat is not None:
+        return conversation.chat
+
+    # Convert OpenAI message format to Gemini chat history
+    # Gemini roles: 'user', 'model'
+    chat_history = []
+    for m in messages[:-1]: # Exclude the last message which is the new prompt
+        role = "user" if m["role"] == "user" else "model"
+        chat_history.append({"role": role, "parts": [m["content"]]})
+
+    chat = model.start_chat(history=chat_history)
+    if conversation is not None:
+        conversation.chat = chat
+    return chat
+
+def converse(conversation: Conversation, content: str) -> Dict[str, Any]:
+    """
+    Sends one new user message in a server-side conversation and records the reply.
+    Raises ConversationBusyError if the conversation already has a turn in progress.
+    """
+    with conversation.turn():
+        conversation.append({"role": "user", "content": content})
+        result = simulate_llm_response(conversation.messages, conversation)
+        conversation.append({"role": "assistant", "content": result["content"]})
+        conversation.sync_chat()
+    return result
+
+def stream_conversation(conversation: Conversation, content: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of converse. The turn is held until the stream finishes or is closed.
+    """
+    with conversation.turn():
+        conversation.append({"role": "user", "content": content})
+        answered = False
+        try:
+            for event in stream_llm_response(conversation.messages, conversation):
+                if event["type"] == "final":
+                    conversation.append({"role": "assistant", "content": event["content"]})
+                    conversation.sync_chat()
+                    answered = True
+                yield event
+        finally:
+            if not answered:
+                # Failed or abandoned (timeout, disconnect): drop the unanswered message so the
+                # history keeps alternating user/assistant and a retry doesn't add it twice
+                conversation.messages.pop()
+
+def stream_llm_response(messages: List[Dict[str, str]], conversation: Optional[Conversation] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of simulate_llm_response.
+    Yields {"type": "token", "content": ...} events as text arrives, followed by a single
+    {"type": "final", "content": ..., "extracted_json": ...} event. The trailing ```json
+    block is never streamed as tokens; it only shows up parsed in the final event.
+    """
+    last_user_msg = messages[-1]["content"].lower() if messages else ""
+    model = get_gemini_model()
+    result = None
+    if model and not RED_FLAG_LEXICON.contains(last_user_msg) and gemini_breaker.allow():
+        emitted = False
+        response = None
+        started = time.perf_counter()
+        try:
+            chat = _start_chat(model, messages, conversation)
+            response = _call_gemini(chat.send_message, messages[-1]["content"], stream=True)
+
+            content = ""
+            sent = 0
+            for chunk in response:
+                content += chunk.text
+                # Hold back anything from the first fence on, plus a possible partial fence
+                fence = content.find("```", sent)
+                safe_end = fence if fence != -1 else len(content)
+                if fence == -1:
+                    while safe_end > sent and content[safe_end - 1] == "`":
+                        safe_end -= 1
+                if safe_end > sent:
+                    emitted = True
+                    yield {"type": "token", "content": content[sent:safe_end]}
+                    sent = safe_end
+
+            LLM_LATENCY.observe(time.perf_counter() - started, operation="stream", outcome="ok")
+            _record_usage("stream", response)
+            LLM_RESPONSES.inc(source="gemini")
+            extracted = parse_llm_json(content)
+            yield {
+                "type": "final",
+                "content": strip_json_block(content),
+                "extracted_json": extracted if extracted else None
+            }
+            return
         except Exception as e:
-            print(f"Quiz Generation Error: {e}")
-            pass
-
-    # Fallback Static Questions
-    return [
-        {
-            "text": "You have a big test tomorrow but your friends are going out tonight.",
-            "options": [
-                { "label": "Study at home", "type": "Calm" },
-                { "label": "Go out with friends", "type": "Impulsive" },
-                { "label": "Ignore both", "type": "Avoidant" },
-            ],
-        },
-        {
-            "text": "Someone posts something mean about you online.",
-            "options": [
-                { "label": "Talk to them directly", "type": "Calm" },
-                { "label": "Post something back", "type": "Impulsive" },
-                { "label": "Pretend you didn't see it", "type": "Avoidant" },
-            ],
-        },
-    ]
+            LLM_LATENCY.observe(time.perf_counter() - started, operation="stream", outcome="error")
+            if response is not None:
+                # Failed mid-stream; failures of the call itself are recorded by _call_gemini
+                gemini_breaker.record_failure()
+            print(f"Gemini API Error: {e}")
+            if conversation is not None:
+                conversation.chat = None
+            if emitted:
+                # The client already shows a partial reply; don't splice a canned one onto it
+                yield {"type": "error", "content": "The response was interrupted. Please try again."}
+                return
+            # Gemini just failed; don't make the user wait for a second attempt
+            LLM_RESPONSES.inc(source="fallback")
+            result = _fallback_response(messages)
+
+    # Red-flag or fallback path: replay the full reply in small chunks
+    if result is None:
+        result = simulate_llm_response(messages, conversation)
+    words = result["content"].split(" ")
+    for i in range(0, len(words), STREAM_CHUNK_WORDS):
+        chunk = " ".join(words[i:i + STREAM_CHUNK_WORDS])
+        if i + STREAM_CHUNK_WORDS < len(words):
+            chunk += " "
+        yield {"type": "token", "content": chunk}
+    yield {
+        "type": "final",
+        "content": result["content"],
+        "extracted_json": result.get("extracted_json")
+    }
+
+def _is_transient(error: Exception) -> bool:
+    # google.api_core errors carry the HTTP status as .code
+    return isinstance(error, ConnectionError) or getattr(error, "code", None) in TRANSIENT_STATUS_CODES
+
+def _call_gemini(fn, *args, **kwargs):
+    """
+    Calls a Gemini SDK method with a deadline, retrying transient errors with jittered
+    exponential backoff while time is left, and reports every attempt to the circuit breaker.
+    """
+    deadline = time.monotonic() + GEMINI_DEADLINE_SECONDS
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            result = fn(*args, request_options={"timeout": max(deadline - started, 0.1)}, **kwargs)
+        except Exception as e:
+            gemini_breaker.record_failure()
+            attempt += 1
+            # "Full jitter" keeps retries from many workers from arriving in lockstep
+            delay = random.uniform(0, GEMINI_RETRY_BASE_SECONDS * 2 ** attempt)
+            if (attempt > GEMINI_RETRIES or not _is_transient(e)
+                    or time.monotonic() + delay >= deadline or not gemini_breaker.allow()):
+                raise
+            print(f"Gemini API Error (retrying in {delay:.2f}s): {e}")
+            time.sleep(delay)
+            continue
+        gemini_breaker.record_success(time.monotonic() - started)
+        return result
+
+def _probe_gemini():
+    # Cheapest possible request; raises if Gemini is still unhealthy
+    get_gemini_model().generate_content(
+        "ping", generation_config={"max_output_tokens": 1}, request_options={"timeout": 5}
+    )
+
+gemini_breaker = CircuitBreaker.from_env("gemini", probe=_probe_gemini)
+
+def _record_usage(operation: str, response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, operation=operation, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, operation=operation, kind="completion")
+
+def strip_json_block(content: str) -> str:
+    """
+    Removes the trailing JSON code block from an LLM reply so it can be displayed.
+    """
+    if "```json" in content:
+        return content.split("```json")[0].strip()
+    elif "```" in content:
+        return content.split("```")[0].strip()
+    return content
 
 def parse_llm_json(content: str) -> Dict[str, Any]:
     """
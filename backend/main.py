@@ -1,5 +1,7 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
+import asyncio
 import os
 
 from pathlib import Path
@@ -9,7 +11,15 @@ load_dotenv(env_path)
 print(f"DEBUG: Main loaded. GEMINI_API_KEY present: {bool(os.environ.get('GEMINI_API_KEY'))}")
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from .database import create_db_and_tables
+from .llm_client import llm_client
+from .llm_service import get_gemini_model
+from .quiz_cache import quiz_cache
+from .pdf_export import pdf_exporter
+from .jobs import scoring_queue
+from .metrics import MetricsMiddleware, render_metrics
+from .events import event_broker
 from .api import routes
 
 app = FastAPI(title="TeenCare API", version="1.0.0")
@@ -21,19 +31,55 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Responses smaller than this aren't worth compressing
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", 1000))
+# Event streams must reach clients as they are written; PDFs, zips and Parquet are compressed already
+STREAMING_PATHS = [r"^/api/events", r"^/api/llm/stream"]
+UNCOMPRESSED_TYPES = ("text/event-stream", "application/pdf", "application/zip", "application/vnd.apache.parquet")
+# brotli-asgi can only exclude by path, so the research export is skipped whatever its format
+# (CSV exports are only compressed by the GZip fallback)
+DOWNLOAD_PATHS = [r"^/api/session/[^/]+/export/pdf$", r"^/api/sessions/export/pdf$", r"^/api/export/sessions$"]
+try:
+    # Optional: brotli for clients that accept it, gzip for the rest
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(
+        BrotliMiddleware, minimum_size=COMPRESSION_MIN_BYTES, gzip_fallback=True,
+        excluded_handlers=STREAMING_PATHS + DOWNLOAD_PATHS,
+    )
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES, exclude_content_types=UNCOMPRESSED_TYPES)
+# Added last so it wraps CORS too and times the whole request
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    # Startup runs on the event loop; events published from worker threads are delivered there
+    event_broker.bind(asyncio.get_running_loop())
+    scoring_queue.start()
     import logging
     logger = logging.getLogger("uvicorn")
     key_present = bool(os.environ.get("GEMINI_API_KEY"))
     logger.info(f"STARTUP CHECK: GEMINI_API_KEY present: {key_present}")
     if key_present:
         logger.info(f"STARTUP CHECK: Key length: {len(os.environ.get('GEMINI_API_KEY') or '')}")
+        # Load the SDK now rather than on the first chat request; without a key it is never imported
+        get_gemini_model()
+        # Fill the default quiz pool so the first quiz page load doesn't wait on Gemini
+        quiz_cache.warm([""])
+
+@app.on_event("shutdown")
+def on_shutdown():
+    scoring_queue.stop()
+    llm_client.shutdown()
+    pdf_exporter.shutdown()
 
 app.include_router(routes.router, prefix="/api")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to TeenCare API"}
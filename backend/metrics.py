@@ -0,0 +1,212 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Default buckets (seconds) for request and LLM latencies; DB queries use finer ones
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Time to send the full response", ["method", "route"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled", ["method"])
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed, by the route that ran them", ["route"])
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "Duration of single SQL statements", ["route"], QUERY_BUCKETS)
+DB_QUERIES_PER_REQUEST = Histogram("db_queries_per_request", "SQL statements per HTTP request", ["route"], COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Total SQL time per HTTP request", ["route"])
+
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "Gemini call duration", ["operation", "outcome"])
+LLM_TOKENS = Counter("llm_tokens_total", "Gemini tokens reported by usage metadata", ["operation", "kind"])
+LLM_RESPONSES = Counter(
+    "llm_responses_total", "Chat replies by where they came from (gemini, fallback, red_flag)", ["source"]
+)
+LLM_BREAKER_STATE = Gauge("llm_circuit_breaker_state", "0 closed, 1 open, 2 half-open", ["backend"])
+LLM_BREAKER_TRANSITIONS = Counter("llm_circuit_breaker_transitions_total", "Breaker state changes", ["backend", "state"])
+
+PDF_RENDER_LATENCY = Histogram("pdf_render_duration_seconds", "WeasyPrint render time, excluding cache hits")
+PDF_CACHE = Counter("pdf_cache_requests_total", "PDF export cache lookups", ["result"])
+REPORT_RENDER_LATENCY = Histogram("report_render_duration_seconds", "Report template render time, excluding cache hits", buckets=QUERY_BUCKETS)
+REPORT_HTML_CACHE = Counter("report_html_cache_requests_total", "Rendered report HTML cache lookups", ["result"])
+
+class RequestStats:
+    """Per-request accumulator the engine event hooks write into."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.query_time = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope before calling the endpoint
+        return _route_of(self.scope)
+
+# Set by MetricsMiddleware for the duration of a request. Starlette copies the context into
+# the threadpool running sync endpoints, so DB hooks there still find the request's stats.
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+def record_query(duration: float):
+    stats = current_request.get()
+    route = stats.route if stats is not None else "background"
+    DB_QUERIES.inc(route=route)
+    DB_QUERY_LATENCY.observe(duration, route=route)
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += duration
+
+def _route_of(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (so streamed responses are timed to their last byte) recording
+    request counts, latency, in-flight requests and the DB work each request did.
+    Routes are labelled by their path template as declared on the router, without the /api
+    prefix it is included under, e.g. /session/{session_id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        # The route isn't known until the router has run, so in-flight requests are per method
+        HTTP_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method=method)
+            current_request.reset(token)
+            route = stats.route
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route=route)
+            DB_TIME_PER_REQUEST.observe(stats.query_time, route=route)
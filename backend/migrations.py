@@ -0,0 +1,78 @@
+from datetime import datetime
+from sqlalchemy import String, cast, inspect, insert, literal, or_, select, text, update
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, Session
+
+from .models import Session as DBSession, ScoringJob, SessionTelemetry, TrendRollup, REPORT_SUMMARY_FIELDS
+from .raw_data import pack_stored_sessions
+from .timeline import TIMELINE_FIELDS, rebuild_timelines
+from .trends import rebuild_rollups
+
+def migrate(engine: Engine):
+    """
+    Creates missing tables and brings existing ones up to the current models: create_all()
+    alone doesn't alter existing tables, so this adds missing columns and indexes, then
+    backfills new columns and tables that can be derived from stored data.
+    """
+    inspector = inspect(engine)
+    new_tables = {t.name for t in SQLModel.metadata.sorted_tables if not inspector.has_table(t.name)}
+    SQLModel.metadata.create_all(engine)
+
+    added = set()
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name in new_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                    added.add(f"{table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+        if any(f"{DBSession.__tablename__}.{field}" in added for field in REPORT_SUMMARY_FIELDS):
+            backfill_report_columns(conn)
+
+    if DBSession.__tablename__ not in new_tables:
+        if TrendRollup.__tablename__ in new_tables:
+            with Session(engine) as db:
+                rebuild_rollups(db)
+        if ScoringJob.__tablename__ in new_tables:
+            with engine.begin() as conn:
+                enqueue_unscored_sessions(conn)
+        if SessionTelemetry.__tablename__ in new_tables:
+            with Session(engine) as db:
+                pack_stored_sessions(db)
+        if any(f"{DBSession.__tablename__}.{field}" in added for field in TIMELINE_FIELDS):
+            with Session(engine) as db:
+                rebuild_timelines(db)
+                db.commit()
+
+def backfill_report_columns(conn):
+    """Copies the summary fields out of every stored report in a single UPDATE."""
+    conn.execute(
+        update(DBSession)
+        .where(DBSession.report.is_not(None))
+        .values(
+            stress_score=DBSession.report["stress_score"].as_float(),
+            stress_label=DBSession.report["stress_label"].as_string(),
+            attention_score=DBSession.report["attention_score"].as_float(),
+            impulsivity=DBSession.report["impulsivity"].as_string(),
+            emotional_bias=DBSession.report["emotional_bias"].as_string(),
+        )
+    )
+
+def enqueue_unscored_sessions(conn):
+    """Queues a scoring job for every session stored without a report."""
+    now = datetime.utcnow()
+    unscored = select(
+        DBSession.id, literal("pending"), literal(0), literal(now), literal(now), literal(now)
+    ).where(
+        # A missing report may be stored as SQL NULL or as a JSON null
+        or_(DBSession.report.is_(None), cast(DBSession.report, String) == "null")
+    )
+    conn.execute(insert(ScoringJob).from_select(
+        ["session_id", "status", "attempts", "run_after", "created_at", "updated_at"], unscored
+    ))
@@ -1,9 +1,31 @@
+import uuid
 from typing import Optional, Dict, Any
-from datetime import datetime
-from sqlmodel import SQLModel, Field, JSON, Column
+from datetime import date, datetime
+from sqlmodel import SQLModel, Field, JSON, Column, Index
+
+# Report fields copied into their own columns so triage queries can filter and sort on indexes
+REPORT_SUMMARY_FIELDS = ["stress_score", "stress_label", "attention_score", "impulsivity", "emotional_bias"]
+
+def report_columns(report: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Values of the denormalized summary columns for a report."""
+    return {field: (report or {}).get(field) for field in REPORT_SUMMARY_FIELDS}
+
+def report_urgency(urgency: str, report: Optional[Dict[str, Any]]) -> str:
+    """A session's urgency once a report is applied: reports can escalate a session but never
+    clear it; that is up to a counselor."""
+    if report and report.get("urgency") == "urgent":
+        return "urgent"
+    return urgency
 
 class Session(SQLModel, table=True):
-    id: Optional[str] = Field(default=None, primary_key=True)
+    __table_args__ = (
+        Index("ix_session_created_at_id", "created_at", "id"),
+        Index("ix_session_urgency_created_at", "urgency", "created_at"),
+        Index("ix_session_urgency_stress_score", "urgency", "stress_score"),
+        Index("ix_session_participant_created_at", "participant_id", "created_at", "id"),
+    )
+
+    id: Optional[str] = Field(default_factory=lambda: uuid.uuid4().hex, primary_key=True)
     participant_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     source: str  # "chat", "quiz", "both"
@@ -14,6 +36,82 @@ class Session(SQLModel, table=True):
     raw_data: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
     report: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
 
+    # Denormalized from `report`; always set through apply_report()
+    stress_score: Optional[float] = None
+    stress_label: Optional[str] = Field(default=None, index=True)
+    attention_score: Optional[float] = None
+    impulsivity: Optional[str] = None
+    emotional_bias: Optional[str] = None
+
+    # Participant timeline, maintained by timeline.update_timeline() over scored sessions:
+    # change since the participant's previous scored session and rolling means
+    stress_delta: Optional[float] = None
+    attention_delta: Optional[float] = None
+    stress_avg: Optional[float] = None
+    attention_avg: Optional[float] = None
+
+    # Set once raw_data has been moved to SessionArchive; raw_data is then {}
+    raw_data_archived_at: Optional[datetime] = None
+
+    def apply_report(self, report: Optional[Dict[str, Any]]):
+        self.report = report
+        self.urgency = report_urgency(self.urgency, report)
+        for field, value in report_columns(report).items():
+            setattr(self, field, value)
+
+class TrendRollup(SQLModel, table=True):
+    """
+    Aggregates of completed session reports per day or week, overall (participant_id "")
+    and per participant. Kept up to date incrementally by trends.record_session_change().
+    """
+    bucket: str = Field(primary_key=True)  # "day", "week"
+    bucket_start: date = Field(primary_key=True)
+    participant_id: str = Field(default="", primary_key=True)
+
+    session_count: int = 0
+    urgent_count: int = 0
+    monitor_count: int = 0
+    stress_sum: float = 0.0
+    stress_count: int = 0
+    attention_sum: float = 0.0
+    attention_count: int = 0
+    impulsivity_high: int = 0
+    impulsivity_moderate: int = 0
+    impulsivity_low: int = 0
+    impulsivity_unknown: int = 0
+
+class ScoringJob(SQLModel, table=True):
+    """Durable queue entry for scoring one session (see jobs.ScoringQueue). One row per session."""
+    __table_args__ = (Index("ix_scoringjob_status_run_after", "status", "run_after"),)
+
+    session_id: str = Field(primary_key=True)
+    status: str = "pending"  # "pending", "running", "done", "failed"
+    attempts: int = 0
+    last_error: Optional[str] = None
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SessionTelemetry(SQLModel, table=True):
+    """
+    Quiz series split out of Session.raw_data and stored packed (see raw_data.py),
+    so large per-trial series don't bloat the session row or its JSON decoding.
+    """
+    session_id: str = Field(primary_key=True)
+    reaction_times: Optional[bytes] = None
+    choice_times: Optional[bytes] = None
+    choices: Optional[bytes] = None
+
+class SessionArchive(SQLModel, table=True):
+    """
+    Cold storage for the raw_data of old sessions (see raw_data.archive_sessions): the full
+    raw_data, packed series included, as compressed JSON. The session keeps its report.
+    """
+    session_id: str = Field(primary_key=True)
+    codec: str  # "zlib", "zstd"
+    data: bytes
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
 class SessionCreate(SQLModel):
     participant_id: str
     source: str
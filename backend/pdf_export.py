@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from .metrics import PDF_CACHE, PDF_RENDER_LATENCY
+
+def _write_pdf(html_content: str) -> bytes:
+    # Runs in a worker process, so only the PDF workers ever pay for importing WeasyPrint
+    from weasyprint import HTML
+    return HTML(string=html_content).write_pdf()
+
+class PdfExporter:
+    """
+    Converts rendered report HTML to PDF in a process pool, so WeasyPrint never blocks the
+    API workers, and caches the result on disk keyed by session id and a hash of the HTML
+    (which covers the report and the session header fields).
+    """
+
+    def __init__(self, cache_dir: str = "pdf_cache", max_workers: int = 2):
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "PdfExporter":
+        return cls(
+            cache_dir=os.environ.get("PDF_CACHE_DIR", "pdf_cache"),
+            max_workers=int(os.environ.get("PDF_RENDER_WORKERS", 2)),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs thread pools isn't safe
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def cache_path(self, session_id: str, html_content: str) -> Path:
+        digest = hashlib.sha256(html_content.encode()).hexdigest()[:16]
+        safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", session_id)
+        return self.cache_dir / f"{safe_id}.{digest}.pdf"
+
+    async def render(self, session_id: str, html_content: str) -> bytes:
+        path = self.cache_path(session_id, html_content)
+        if path.exists():
+            PDF_CACHE.inc(result="hit")
+            return path.read_bytes()
+
+        PDF_CACHE.inc(result="miss")
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        pdf = await loop.run_in_executor(self._get_pool(), _write_pdf, html_content)
+        PDF_RENDER_LATENCY.observe(time.perf_counter() - started)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Drop PDFs of older versions of this report
+        for stale in self.cache_dir.glob(path.name.split(".")[0] + ".*.pdf"):
+            stale.unlink(missing_ok=True)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(pdf)
+        os.replace(tmp_path, path)
+        return pdf
+
+    async def render_zip(self, documents: Dict[str, str]) -> bytes:
+        """Renders {session_id: html} in parallel and returns a zip of session_<id>.pdf files."""
+        session_ids = list(documents)
+        pdfs = await asyncio.gather(*(self.render(sid, documents[sid]) for sid in session_ids))
+        buffer = io.BytesIO()
+        # PDFs are already compressed
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for session_id, pdf in zip(session_ids, pdfs):
+                archive.writestr(f"session_{session_id}.pdf", pdf)
+        return buffer.getvalue()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+pdf_exporter = PdfExporter.from_env()
@@ -0,0 +1,143 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .llm_client import llm_client, LLMSaturatedError
+from .llm_service import generate_model_quiz_questions
+
+QuizSet = List[Dict[str, Any]]
+
+def normalize_context(context: str) -> str:
+    """Lowercases, drops punctuation and collapses whitespace so near-identical contexts share a key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (context or "").lower()).split())
+
+class QuizCache:
+    """
+    Pool of pre-generated quiz sets per normalized context.
+    - get() never calls the model: it hands out a pooled set (or None on a cold miss) and
+      schedules a background refill on the LLM pool whenever the pool runs low.
+    - Contexts are evicted least-recently-used past max_entries; sets expire after ttl_seconds.
+    - With a path, the cache is persisted as JSON and reloaded on startup.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Optional[QuizSet]],
+        max_entries: int = 128,
+        ttl_seconds: float = 6 * 3600,
+        pool_size: int = 3,
+        path: Optional[str] = None,
+    ):
+        self.generate = generate
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.pool_size = pool_size
+        self.path = path
+        # key -> list of [created_at, questions], oldest first
+        self._entries: "OrderedDict[str, List[list]]" = OrderedDict()
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if path:
+            self._load()
+
+    @classmethod
+    def from_env(cls, generate: Callable[[str], Optional[QuizSet]]) -> "QuizCache":
+        return cls(
+            generate,
+            max_entries=int(os.environ.get("QUIZ_CACHE_MAX_ENTRIES", 128)),
+            ttl_seconds=float(os.environ.get("QUIZ_CACHE_TTL_SECONDS", 6 * 3600)),
+            pool_size=int(os.environ.get("QUIZ_CACHE_POOL_SIZE", 3)),
+            path=os.environ.get("QUIZ_CACHE_PATH") or None,
+        )
+
+    def get(self, context: str = "") -> Optional[QuizSet]:
+        key = normalize_context(context)
+        now = time.time()
+        with self._lock:
+            sets = self._entries.get(key)
+            if sets is not None:
+                sets[:] = [s for s in sets if now - s[0] < self.ttl_seconds]
+                self._entries.move_to_end(key)
+            questions = None
+            if sets:
+                # Hand out a different set each time, but keep the last one to serve until refilled
+                questions = sets.pop(0)[1] if len(sets) > 1 else sets[0][1]
+            low = not sets or len(sets) < self.pool_size
+        if low:
+            self._schedule_refill(key, context)
+        return questions
+
+    def put(self, context: str, questions: QuizSet):
+        key = normalize_context(context)
+        with self._lock:
+            sets = self._entries.setdefault(key, [])
+            sets.append([time.time(), questions])
+            del sets[:-self.pool_size]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.path:
+            self._save()
+
+    def warm(self, contexts: Iterable[str]):
+        """Schedules background generation so the given contexts are hot before the first request."""
+        for context in contexts:
+            self.get(context)
+
+    def _schedule_refill(self, key: str, context: str):
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        try:
+            future = llm_client.submit(self._refill, key, context)
+        except LLMSaturatedError:
+            # Chat traffic comes first; try again on the next request
+            with self._lock:
+                self._refilling.discard(key)
+            return
+        future.add_done_callback(lambda _f: self._refilling.discard(key))
+
+    def _refill(self, key: str, context: str):
+        with self._lock:
+            missing = self.pool_size - len(self._entries.get(key, []))
+        for _ in range(missing):
+            questions = self.generate(context)
+            if not questions:
+                # Model unavailable; the request path keeps serving fallback questions
+                break
+            self.put(context, questions)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Quiz cache load error: {e}")
+            return
+        now = time.time()
+        for key, sets in data.items():
+            fresh = [s for s in sets if now - s[0] < self.ttl_seconds]
+            if fresh:
+                self._entries[key] = fresh[-self.pool_size:]
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._entries)
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Quiz cache save error: {e}")
+
+quiz_cache = QuizCache.from_env(generate_model_quiz_questions)
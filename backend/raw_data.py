@@ -0,0 +1,238 @@
+import json
+import os
+import sys
+import zlib
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, delete, insert, select, update
+
+from .models import Session as DBSession, SessionArchive, SessionTelemetry
+
+# Quiz series stored packed in SessionTelemetry instead of the raw_data JSON: column -> path
+PACKED_SERIES = {
+    "reaction_times": ("quiz", "reaction", "reaction_times"),
+    "choice_times": ("quiz", "decision", "choice_times"),
+    "choices": ("quiz", "decision", "choices"),
+}
+CHOICE_CODES = ["calm", "avoidant", "impulsive"]
+_CHOICE_INDEX = {choice: i for i, choice in enumerate(CHOICE_CODES)}
+
+# Integer typecodes from smallest to largest, with the range each can hold
+_INT_TYPES = [("h", 2 ** 15), ("i", 2 ** 31), ("q", 2 ** 63)]
+
+# Sessions older than this are moved to SessionArchive by scripts/archive_sessions.py
+RAW_DATA_HOT_DAYS = int(os.environ.get("RAW_DATA_HOT_DAYS", 180))
+# "zlib", or "zstd" (smaller and faster, needs the zstandard package)
+ARCHIVE_CODEC = os.environ.get("RAW_DATA_ARCHIVE_CODEC", "zlib")
+
+def _to_bytes(values: array) -> bytes:
+    # Always stored little-endian
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.typecode.encode() + values.tobytes()
+
+def encode_series(values: Any) -> Optional[bytes]:
+    """
+    Packs a list of numbers or choice labels into bytes: one typecode byte, then the items.
+    Returns None for anything that can't be stored losslessly (mixed ints and floats,
+    unknown labels, ...), which then stays in the JSON.
+    """
+    if not isinstance(values, list) or not values:
+        return None
+    if all(type(v) is int for v in values):
+        low, high = min(values), max(values)
+        for typecode, limit in _INT_TYPES:
+            if -limit <= low and high < limit:
+                return _to_bytes(array(typecode, values))
+        return None
+    if all(type(v) is float for v in values):
+        return _to_bytes(array("d", values))
+    if all(isinstance(v, str) and v in _CHOICE_INDEX for v in values):
+        return b"B" + bytes(_CHOICE_INDEX[v] for v in values)
+    return None
+
+def decode_series(data: bytes) -> List[Any]:
+    typecode = chr(data[0])
+    if typecode == "B":
+        return [CHOICE_CODES[code] for code in data[1:]]
+    values = array(typecode)
+    values.frombytes(data[1:])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+def _copy_path(raw_data: Dict[str, Any], path: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """Shallow-copies the dicts along path (except the leaf) and returns the innermost copy."""
+    node = raw_data
+    for key in path[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            return None
+        node[key] = dict(child)
+        node = node[key]
+    return node
+
+def split_raw_data(raw_data: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """
+    Returns (raw_data without the packable series, {column: packed bytes}).
+    The input is not modified.
+    """
+    stripped = dict(raw_data or {})
+    packed = {}
+    for column, path in PACKED_SERIES.items():
+        parent = _copy_path(stripped, path)
+        if parent is None:
+            continue
+        data = encode_series(parent.get(path[-1]))
+        if data is not None:
+            packed[column] = data
+            del parent[path[-1]]
+    return stripped, packed
+
+def merge_raw_data(raw_data: Optional[Dict[str, Any]], telemetry: Optional[SessionTelemetry]) -> Dict[str, Any]:
+    """Inverse of split_raw_data: the raw_data JSON with the packed series decoded back in."""
+    merged = dict(raw_data or {})
+    if telemetry is None:
+        return merged
+    for column, path in PACKED_SERIES.items():
+        data = getattr(telemetry, column)
+        if data is None:
+            continue
+        node = merged
+        for key in path[:-1]:
+            node[key] = dict(node.get(key) or {})
+            node = node[key]
+        node[path[-1]] = decode_series(data)
+    return merged
+
+def pack_session(session: DBSession) -> Optional[SessionTelemetry]:
+    """
+    Moves the session's packable series out of raw_data. Returns the telemetry row to store
+    alongside the session (the caller adds it), or None if there was nothing to pack.
+    """
+    session.raw_data, packed = split_raw_data(session.raw_data)
+    if not packed:
+        return None
+    return SessionTelemetry(session_id=session.id, **packed)
+
+def compress_raw_data(raw_data: Dict[str, Any], codec: str = ARCHIVE_CODEC) -> bytes:
+    data = json.dumps(raw_data, separators=(",", ":")).encode()
+    if codec == "zstd":
+        # Optional dependency, only needed when configured
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, 9)
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+def decompress_raw_data(archive: SessionArchive) -> Dict[str, Any]:
+    if archive.codec == "zstd":
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(archive.data)
+    elif archive.codec == "zlib":
+        data = zlib.decompress(archive.data)
+    else:
+        raise ValueError(f"Unknown archive codec: {archive.codec}")
+    return json.loads(data)
+
+def load_raw_data(db: Session, session: DBSession) -> Dict[str, Any]:
+    """The session's full raw_data as clients sent it. Decodes the packed series and archived data."""
+    if session.raw_data_archived_at is not None:
+        archive = db.get(SessionArchive, session.id)
+        if archive is not None:
+            return decompress_raw_data(archive)
+    return merge_raw_data(session.raw_data, db.get(SessionTelemetry, session.id))
+
+def load_raw_data_many(db: Session, sessions: Iterable[Any], chunk_size: int = 500) -> List[Dict[str, Any]]:
+    """
+    load_raw_data for many sessions (or rows with id and raw_data) with one query per
+    table and chunk. Archived sessions are found by id, so rows need no other columns.
+    """
+    sessions = list(sessions)
+    telemetry, archived = {}, {}
+    for i in range(0, len(sessions), chunk_size):
+        ids = [s.id for s in sessions[i:i + chunk_size]]
+        for row in db.exec(select(SessionTelemetry).where(SessionTelemetry.session_id.in_(ids))):
+            telemetry[row.session_id] = row
+        for row in db.exec(select(SessionArchive).where(SessionArchive.session_id.in_(ids))):
+            archived[row.session_id] = row
+    return [
+        decompress_raw_data(archived[s.id]) if s.id in archived else merge_raw_data(s.raw_data, telemetry.get(s.id))
+        for s in sessions
+    ]
+
+def pack_stored_sessions(db: Session, chunk_size: int = 500) -> int:
+    """
+    Moves the packable series of already stored sessions into SessionTelemetry, one commit
+    per chunk. Used when the table is first created. Returns the number of sessions packed.
+    """
+    total = 0
+    last_id = None
+    while True:
+        query = select(DBSession.id, DBSession.raw_data).order_by(DBSession.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(DBSession.id > last_id)
+        rows = db.exec(query).all()
+        if not rows:
+            break
+
+        updates, telemetry = [], []
+        for row in rows:
+            stripped, packed = split_raw_data(row.raw_data)
+            if packed:
+                updates.append({"id": row.id, "raw_data": stripped})
+                # executemany needs the same keys in every row
+                telemetry.append({"session_id": row.id, **dict.fromkeys(PACKED_SERIES), **packed})
+        if updates:
+            db.exec(update(DBSession), params=updates)
+            db.exec(insert(SessionTelemetry), params=telemetry)
+        db.commit()
+
+        total += len(updates)
+        last_id = rows[-1].id
+    return total
+
+def archive_sessions(
+    db: Session,
+    older_than: datetime,
+    codec: str = ARCHIVE_CODEC,
+    chunk_size: int = 500,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Moves the raw_data (and packed series) of sessions created before older_than into
+    SessionArchive, one commit per chunk. Reports and summary columns stay on the session,
+    and load_raw_data keeps returning the same data. Returns the number of sessions archived.
+    """
+    total = 0
+    last_id = None
+    while True:
+        query = (
+            select(DBSession.id, DBSession.raw_data)
+            .where(DBSession.created_at < older_than, DBSession.raw_data_archived_at.is_(None))
+            .order_by(DBSession.id)
+            .limit(chunk_size)
+        )
+        if last_id is not None:
+            query = query.where(DBSession.id > last_id)
+        rows = db.exec(query).all()
+        if not rows:
+            break
+
+        ids = [row.id for row in rows]
+        now = datetime.utcnow()
+        db.exec(insert(SessionArchive), params=[
+            {"session_id": row.id, "codec": codec, "data": compress_raw_data(raw, codec), "archived_at": now}
+            for row, raw in zip(rows, load_raw_data_many(db, rows, chunk_size))
+        ])
+        db.exec(update(DBSession).where(DBSession.id.in_(ids)).values(raw_data={}, raw_data_archived_at=now))
+        db.exec(delete(SessionTelemetry).where(SessionTelemetry.session_id.in_(ids)))
+        db.commit()
+
+        total += len(rows)
+        last_id = rows[-1].id
+        if progress:
+            progress(total)
+    return total
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader
+
+from .metrics import REPORT_HTML_CACHE, REPORT_RENDER_LATENCY
+from .models import Session as DBSession
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+REPORT_TEMPLATE = "report.html"
+
+def report_fields(session: DBSession) -> Dict[str, Any]:
+    """Everything report.html reads from a session. The template must not use anything else."""
+    return {
+        "id": session.id,
+        "created_at": session.created_at,
+        "participant_id": session.participant_id,
+        "urgency": session.urgency,
+        "report": session.report,
+    }
+
+def report_hash(session: DBSession) -> str:
+    """Changes whenever the rendered report would, so it serves as cache key and ETag."""
+    encoded = json.dumps(report_fields(session), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+class ReportRenderer:
+    """
+    Renders session reports to HTML. The templates are compiled once, from a path that
+    doesn't depend on the working directory, and rendered HTML is kept in an LRU keyed by
+    report_hash, so previewing an unchanged report costs a dictionary lookup.
+    """
+
+    def __init__(self, template_dir: Path = TEMPLATE_DIR, max_entries: int = 256):
+        # auto_reload off: templates are read and compiled once per process
+        self.env = Environment(loader=FileSystemLoader(str(template_dir)), autoescape=True, auto_reload=False)
+        self.template = self.env.get_template(REPORT_TEMPLATE)
+        self.max_entries = max_entries
+        self._html: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ReportRenderer":
+        return cls(max_entries=int(os.environ.get("REPORT_HTML_CACHE_SIZE", 256)))
+
+    def render(self, session: DBSession, digest: Optional[str] = None) -> Tuple[str, str]:
+        """Returns (html, report_hash). Pass the hash if it was already computed."""
+        digest = digest or report_hash(session)
+        with self._lock:
+            html = self._html.get(digest)
+            if html is not None:
+                self._html.move_to_end(digest)
+        if html is not None:
+            REPORT_HTML_CACHE.inc(result="hit")
+            return html, digest
+
+        REPORT_HTML_CACHE.inc(result="miss")
+        started = time.perf_counter()
+        html = self.template.render(session=report_fields(session))
+        REPORT_RENDER_LATENCY.observe(time.perf_counter() - started)
+        with self._lock:
+            self._html[digest] = html
+            while len(self._html) > self.max_entries:
+                self._html.popitem(last=False)
+        return html, digest
+
+    def clear(self):
+        with self._lock:
+            self._html.clear()
+
+report_renderer = ReportRenderer.from_env()
@@ -0,0 +1,188 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlmodel import Session, select
+
+from .models import Session as DBSession
+from .raw_data import load_raw_data_many
+from .scoring import quiz_features
+
+EXPORT_FORMATS = ["csv", "parquet"]
+REPORT_FIELDS = ["stress_score", "stress_label", "attention_score", "impulsivity", "emotional_bias"]
+META_FIELDS = ["age", "sleep_hours", "mood_emoji"]
+QUIZ_FIELDS = [
+    "trial_count", "misses", "mean_rt", "std_rt", "miss_rate",
+    "negative_confusions", "choice_count", "impulsive_prop",
+]
+CHAT_FIELDS = ["mood_word", "mood_tone", "sleep_hours", "main_stressor", "red_flag"]
+
+# One flat row per session; nested fields are prefixed with where they come from
+EXPORT_COLUMNS = (
+    ["session_id", "participant_id", "created_at", "source", "urgency"]
+    + REPORT_FIELDS
+    + [f"meta_{f}" for f in META_FIELDS]
+    + [f"quiz_{f}" for f in QUIZ_FIELDS]
+    + [f"chat_{f}" for f in CHAT_FIELDS]
+)
+# Parquet column types; the rest are strings
+PARQUET_TYPES = {
+    "created_at": "datetime",
+    "stress_score": "float", "attention_score": "float",
+    "meta_age": "int", "meta_sleep_hours": "float",
+    "quiz_trial_count": "int", "quiz_misses": "int", "quiz_choice_count": "int",
+    "quiz_mean_rt": "float", "quiz_std_rt": "float", "quiz_miss_rate": "float",
+    "quiz_negative_confusions": "float", "quiz_impulsive_prop": "float",
+    "chat_sleep_hours": "float", "chat_red_flag": "bool",
+}
+
+def flatten_session(row: Any, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    """One export row: summary columns, selected meta, quiz aggregates and extracted chat fields."""
+    flat = {
+        "session_id": row.id,
+        "participant_id": row.participant_id,
+        "created_at": row.created_at,
+        "source": row.source,
+        "urgency": row.urgency,
+    }
+    for field in REPORT_FIELDS:
+        flat[field] = getattr(row, field)
+    meta = row.meta or {}
+    for field in META_FIELDS:
+        flat[f"meta_{field}"] = meta.get(field)
+
+    quiz = raw_data.get("quiz")
+    features = quiz_features(quiz) if row.source in ("quiz", "both") and quiz else {}
+    for field in QUIZ_FIELDS:
+        flat[f"quiz_{field}"] = features.get(field)
+
+    extracted = raw_data.get("llm_extracted") or {}
+    for field in CHAT_FIELDS:
+        flat[f"chat_{field}"] = extracted.get(field)
+    return flat
+
+def iter_export_chunks(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: Optional[str] = None,
+    chunk_size: int = 1000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Flattened sessions in created_at order, chunk_size rows at a time. Rows are streamed
+    from the database (yield_per), so memory stays flat however many sessions match.
+    """
+    query = select(
+        DBSession.id, DBSession.participant_id, DBSession.created_at, DBSession.source,
+        DBSession.urgency, DBSession.meta, DBSession.raw_data, *(getattr(DBSession, f) for f in REPORT_FIELDS),
+    )
+    if since:
+        query = query.where(DBSession.created_at >= since)
+    if until:
+        query = query.where(DBSession.created_at < until)
+    if source:
+        query = query.where(DBSession.source == source)
+    query = query.order_by(DBSession.created_at, DBSession.id).execution_options(yield_per=chunk_size)
+
+    for rows in db.exec(query).partitions():
+        raw_data = load_raw_data_many(db, rows, chunk_size)
+        yield [flatten_session(row, raw) for row, raw in zip(rows, raw_data)]
+
+def iter_csv(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Encodes export chunks as CSV, one piece of text per chunk (the first has the header)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+class _Drain(io.RawIOBase):
+    """Write-only file whose contents are taken out as they are produced."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def iter_parquet(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """
+    Encodes export chunks as Parquet, one row group per chunk, yielding the bytes written
+    so far after each. Needs pyarrow, which is only imported here.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {"str": pa.string(), "float": pa.float64(), "int": pa.int64(), "bool": pa.bool_(), "datetime": pa.timestamp("us")}
+    schema = pa.schema([(name, arrow_types[PARQUET_TYPES.get(name, "str")]) for name in EXPORT_COLUMNS])
+    sink = _Drain()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in chunks:
+            # meta and extracted fields are free-form JSON: values that don't fit the column type are dropped
+            columns = {
+                name: [_coerce(row[name], PARQUET_TYPES.get(name, "str")) for row in chunk]
+                for name in EXPORT_COLUMNS
+            }
+            writer.write_table(pa.table(columns, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+def _to_int(value: Any) -> int:
+    """Integral values only: 3, 3.0 and "3.0" become 3; 3.7 is rejected rather than truncated."""
+    if isinstance(value, bool):
+        raise ValueError("not an integer")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError("not an integer")
+    return int(number)
+
+_BOOL_STRINGS = {"true": True, "false": False, "1": True, "0": False}
+
+def _to_bool(value: Any) -> bool:
+    """Booleans, 0/1 and the strings "true"/"false"/"1"/"0"; bool("false") would be True."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in _BOOL_STRINGS:
+        return _BOOL_STRINGS[value.strip().lower()]
+    raise ValueError("not a boolean")
+
+_CONVERTERS = {"str": str, "float": float, "int": _to_int, "bool": _to_bool}
+
+def _coerce(value: Any, kind: str) -> Any:
+    if value is None or kind == "datetime":
+        return value
+    try:
+        return _CONVERTERS[kind](value)
+    except (TypeError, ValueError, OverflowError):
+        return None
@@ -1,7 +1,29 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import statistics
+from .lexicon import NEGATIVE_LEXICON
 
-def calculate_stress_score(quiz_data: Dict[str, Any], chat_transcript: List[Dict[str, str]]) -> float:
+def quiz_features(quiz_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The quiz aggregates the scores below are computed from: reaction time statistics,
+    miss rate, emotion sort confusions and the share of impulsive choices.
+    """
+    reaction = quiz_data.get("reaction", {})
+    rts = reaction.get("reaction_times", [])
+    misses = reaction.get("misses", 0)
+    total_trials = len(rts) + misses
+    choices = quiz_data.get("decision", {}).get("choices", [])
+    return {
+        "trial_count": len(rts),
+        "misses": misses,
+        "mean_rt": statistics.mean(rts) if rts else 0,
+        "std_rt": statistics.stdev(rts) if len(rts) > 1 else 0,
+        "miss_rate": misses / total_trials if total_trials > 0 else 0,
+        "negative_confusions": quiz_data.get("emotion_sort", {}).get("negative_confusions", 0),
+        "choice_count": len(choices),
+        "impulsive_prop": choices.count("impulsive") / len(choices) if choices else 0,
+    }
+
+def calculate_stress_score(quiz_data: Dict[str, Any], chat_transcript: List[Dict[str, str]], features: Optional[Dict[str, Any]] = None) -> float:
     """
     Stress_score (0-1):
     Start 0.3 baseline.
@@ -10,67 +32,46 @@ def calculate_stress_score(quiz_data: Dict[str, Any], chat_transcript: List[Dict
     +0.2 if negative_confusions > 0.2
     +0.2 if impulsive_prop > 0.5
     Clamp to [0,1]
+    `features` are quiz_features(quiz_data), if the caller already has them.
     """
     score = 0.3
-    
-    reaction = quiz_data.get("reaction", {})
-    decision = quiz_data.get("decision", {})
-    emotion = quiz_data.get("emotion_sort", {})
+    features = features or quiz_features(quiz_data)
 
     # Reaction metrics
-    rts = reaction.get("reaction_times", [])
-    misses = reaction.get("misses", 0)
-    total_trials = len(rts) + misses
-    mean_rt = statistics.mean(rts) if rts else 0
-    miss_rate = misses / total_trials if total_trials > 0 else 0
-
-    if mean_rt > 450:
+    if features["mean_rt"] > 450:
         score += 0.2
-    if miss_rate > 0.1:
+    if features["miss_rate"] > 0.1:
         score += 0.15
 
     # Emotion metrics
-    neg_conf = emotion.get("negative_confusions", 0)
-    if neg_conf > 0.2:
+    if features["negative_confusions"] > 0.2:
         score += 0.2
 
     # Decision metrics
-    choices = decision.get("choices", [])
-    impulsive_count = choices.count("impulsive")
-    impulsive_prop = impulsive_count / len(choices) if choices else 0
-    
-    if impulsive_prop > 0.5:
+    if features["impulsive_prop"] > 0.5:
         score += 0.2
 
     return min(max(score, 0.0), 1.0)
 
-def calculate_attention_score(quiz_data: Dict[str, Any]) -> float:
+def calculate_attention_score(quiz_data: Dict[str, Any], features: Optional[Dict[str, Any]] = None) -> float:
     """
     Attention_score (0-100):
     Base 100 - (mean_rt_ms / 10) - (std_rt / 2) - (misses * 10). Clamp 0-100.
     """
-    reaction = quiz_data.get("reaction", {})
-    rts = reaction.get("reaction_times", [])
-    misses = reaction.get("misses", 0)
-    
-    if not rts:
+    features = features or quiz_features(quiz_data)
+    if not features["trial_count"]:
         return 0.0
 
-    mean_rt = statistics.mean(rts)
-    std_rt = statistics.stdev(rts) if len(rts) > 1 else 0
-    
-    score = 100 - (mean_rt / 10) - (std_rt / 2) - (misses * 10)
+    score = 100 - (features["mean_rt"] / 10) - (features["std_rt"] / 2) - (features["misses"] * 10)
     return min(max(score, 0.0), 100.0)
 
-def get_impulsivity_label(quiz_data: Dict[str, Any]) -> str:
-    decision = quiz_data.get("decision", {})
-    choices = decision.get("choices", [])
-    if not choices:
+def get_impulsivity_label(quiz_data: Dict[str, Any], features: Optional[Dict[str, Any]] = None) -> str:
+    features = features or quiz_features(quiz_data)
+    if not features["choice_count"]:
         return "Unknown"
-        
-    impulsive_count = choices.count("impulsive")
-    prop = impulsive_count / len(choices)
-    
+
+    prop = features["impulsive_prop"]
+
     if prop > 0.5:
         return "High"
     elif prop >= 0.25:
@@ -82,16 +83,12 @@ def get_emotional_bias(quiz_data: Dict[str, Any], chat_transcript: List[Dict[str
     emotion = quiz_data.get("emotion_sort", {})
     neg_conf = emotion.get("negative_confusions", 0)
     
-    # Simple check for negative words in chat if provided
+    # Count user messages containing negative words, if a transcript is provided
     # (This is a placeholder for more complex NLP if needed)
-    negative_words = ["sad", "angry", "hopeless", "rough", "bad"]
     chat_neg_count = 0
     if chat_transcript:
-        for msg in chat_transcript:
-            if msg.get("role") == "user":
-                text = msg.get("text", "").lower()
-                if any(w in text for w in negative_words):
-                    chat_neg_count += 1
+        hits = NEGATIVE_LEXICON.scan_transcript(chat_transcript, role="user", key="text")
+        chat_neg_count = len({hit.message_index for hit in hits})
 
     if neg_conf > 0.2 or chat_neg_count > 0:
         return "Negative"
@@ -105,9 +102,11 @@ def generate_summary(session_data: Dict[str, Any]) -> Dict[str, Any]:
     
     if source in ["quiz", "both"]:
         quiz = raw.get("quiz", {})
-        summary["stress_score"] = calculate_stress_score(quiz, raw.get("chat_transcript", []))
-        summary["attention_score"] = calculate_attention_score(quiz)
-        summary["impulsivity"] = get_impulsivity_label(quiz)
+        # Computed once and shared by the three scores
+        features = quiz_features(quiz)
+        summary["stress_score"] = calculate_stress_score(quiz, raw.get("chat_transcript", []), features)
+        summary["attention_score"] = calculate_attention_score(quiz, features)
+        summary["impulsivity"] = get_impulsivity_label(quiz, features)
         summary["emotional_bias"] = get_emotional_bias(quiz, raw.get("chat_transcript", []))
         
         # Map stress score to label
@@ -123,5 +122,7 @@ def generate_summary(session_data: Dict[str, Any]) -> Dict[str, Any]:
         # Add LLM extracted data if available
         llm_data = raw.get("llm_extracted", {})
         summary["clinical_notes"] = llm_data
+        if llm_data.get("red_flag"):
+            summary["urgency"] = "urgent"
         
     return summary
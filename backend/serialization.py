@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Tuple
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional; the standard json module is used without it
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """JSON-encodes plain dicts/lists, datetimes included, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    """
+    JSON response for payloads that are already plain data (e.g. model_dump() output):
+    encodes them directly, skipping FastAPI's jsonable_encoder walk. Also accepts bytes
+    that were encoded beforehand.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class SessionPayloadCache:
+    """
+    Encoded JSON of completed session payloads, LRU by session id. An entry is only reused
+    while the freshly loaded payload still equals the one it was encoded from (a C-level
+    dict comparison, much cheaper than encoding), so re-scores, escalations and edits made
+    by other processes are never served stale. Sessions without a report aren't cached.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionPayloadCache":
+        return cls(max_entries=int(os.environ.get("SESSION_PAYLOAD_CACHE_SIZE", 1024)))
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        session_id = payload.get("id")
+        if not payload.get("report") or session_id is None:
+            return dumps(payload)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+        if entry is not None and entry[0] == payload:
+            return entry[1]
+
+        encoded = dumps(payload)
+        with self._lock:
+            self._entries[session_id] = (payload, encoded)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def encode_list(self, payloads: List[Dict[str, Any]]) -> bytes:
+        """A JSON array of payloads, reusing cached encodings item by item."""
+        return b"[" + b",".join(self.encode(p) for p in payloads) + b"]"
+
+session_payload_cache = SessionPayloadCache.from_env()
@@ -0,0 +1,20 @@
+from typing import Any, Dict
+
+from sqlmodel import Session
+
+from .events import stage_session_events
+from .models import Session as DBSession
+from .timeline import lock_participant_timeline, update_timeline
+from .trends import record_session_change
+
+def save_report(db: Session, session: DBSession, report: Dict[str, Any]):
+    """
+    Stores a newly generated report on a session and updates everything derived from it.
+    The caller commits; dashboard events go out with the commit.
+    """
+    lock_participant_timeline(db, session.participant_id)
+    old_report, old_urgency = session.report, session.urgency
+    session.apply_report(report)
+    record_session_change(db, session, old_report, old_urgency)
+    update_timeline(db, session)
+    stage_session_events(db, session, completed=old_report is None, old_urgency=old_urgency)
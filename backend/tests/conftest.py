@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# backend.database creates its engine on import: point it at a throwaway database first
+# (assigned, not defaulted, so a DATABASE_URL from the environment is never wiped)
+_db_dir = tempfile.mkdtemp(prefix="teencare-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["LLM_BACKEND"] = "fake"
+
+import pytest
+from sqlmodel import SQLModel, Session, delete
+
+from backend.database import create_db_and_tables, engine
+
+@pytest.fixture
+def db():
+    create_db_and_tables()
+    with Session(engine) as session:
+        yield session
+    # Empty every table so tests don't see each other's rows
+    with Session(engine) as session:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            session.exec(delete(table))
+        session.commit()
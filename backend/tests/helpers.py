@@ -0,0 +1,12 @@
+"""Test data builders shared by the backend tests."""
+
+def quiz_raw_data(reaction_times, misses=0, choices=(), negative_confusions=0.0):
+    """raw_data of a quiz session, in the shape the frontend sends."""
+    choices = list(choices)
+    return {
+        "quiz": {
+            "reaction": {"reaction_times": list(reaction_times), "misses": misses},
+            "decision": {"choices": choices, "choice_times": [900 + 50 * i for i in range(len(choices))]},
+            "emotion_sort": {"negative_confusions": negative_confusions},
+        }
+    }
@@ -0,0 +1,85 @@
+import copy
+import math
+
+from sqlmodel import select
+
+from backend.batch_scoring import rescore_all_sessions, score_sessions
+from backend.events import event_broker
+from backend.models import Session as DBSession
+from backend.raw_data import load_raw_data, pack_session
+from backend.scoring import generate_summary
+from backend.tests.helpers import quiz_raw_data
+
+def _sessions():
+    red_flag = {"chat_transcript": [{"role": "user", "text": "I feel hopeless"}], "llm_extracted": {"mood_word": "sad", "red_flag": True}}
+    calm_chat = {"chat_transcript": [{"role": "user", "text": "pretty good"}], "llm_extracted": {"mood_word": "good", "red_flag": False}}
+    return [
+        {"source": "quiz", "raw_data": quiz_raw_data([412, 388, 530, 610], misses=2, choices=["impulsive", "impulsive", "calm"], negative_confusions=0.4)},
+        {"source": "quiz", "raw_data": quiz_raw_data([250], choices=["calm", "avoidant", "calm", "impulsive"])},
+        {"source": "quiz", "raw_data": quiz_raw_data([], misses=3)},
+        {"source": "quiz", "raw_data": {}},
+        {"source": "chat", "raw_data": red_flag},
+        {"source": "chat", "raw_data": calm_chat},
+        {"source": "both", "raw_data": {**quiz_raw_data([480, 500.5], misses=1, choices=["avoidant"]), **red_flag}},
+    ]
+
+def _assert_same_summary(single, batch):
+    assert single.keys() == batch.keys()
+    for key, value in single.items():
+        if isinstance(value, float):
+            assert math.isclose(value, batch[key], rel_tol=1e-12)
+        else:
+            assert value == batch[key]
+
+def test_score_sessions_matches_generate_summary():
+    sessions = _sessions()
+    for session, batch in zip(sessions, score_sessions(sessions)):
+        _assert_same_summary(generate_summary(session), batch)
+
+def test_rescore_matches_generate_summary_and_apply_report(db):
+    stored = []
+    for data in _sessions():
+        session = DBSession(participant_id="p1", source=data["source"], raw_data=copy.deepcopy(data["raw_data"]))
+        db.add(session)
+        telemetry = pack_session(session)
+        if telemetry is not None:
+            db.add(telemetry)
+        stored.append(session.id)
+    db.commit()
+
+    # What the per-session path (scoring queue -> save_report -> apply_report) would store
+    expected = {}
+    for session_id in stored:
+        session = db.get(DBSession, session_id)
+        shadow = DBSession(participant_id=session.participant_id, source=session.source, urgency=session.urgency)
+        shadow.apply_report(generate_summary({"source": session.source, "raw_data": load_raw_data(db, session)}))
+        expected[session_id] = shadow
+    last_seq = event_broker._seq
+
+    assert rescore_all_sessions(db, chunk_size=3) == len(stored)
+    db.expire_all()
+
+    for session_id in stored:
+        session, shadow = db.get(DBSession, session_id), expected[session_id]
+        _assert_same_summary(shadow.report, session.report)
+        assert session.urgency == shadow.urgency
+        for field in ["stress_score", "stress_label", "attention_score", "impulsivity", "emotional_bias"]:
+            assert getattr(session, field) == getattr(shadow, field)
+
+    urgent = {session_id for session_id, shadow in expected.items() if shadow.urgency == "urgent"}
+    assert len(urgent) == 2
+    escalated = [e for e in event_broker._buffer if e["seq"] > last_seq and e["type"] == "escalated"]
+    assert {e["data"]["session_id"] for e in escalated} == urgent
+
+    # Re-scoring again changes nothing and doesn't escalate twice
+    last_seq = event_broker._seq
+    rescore_all_sessions(db)
+    assert not [e for e in event_broker._buffer if e["seq"] > last_seq]
+
+def test_rescore_never_clears_urgency(db):
+    session = DBSession(participant_id="p1", source="chat", urgency="urgent", raw_data={"llm_extracted": {"red_flag": False}})
+    db.add(session)
+    db.commit()
+    rescore_all_sessions(db)
+    db.expire_all()
+    assert db.exec(select(DBSession.urgency)).one() == "urgent"
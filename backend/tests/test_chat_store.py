@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import chat_store as chat_store_module, llm_service
+from backend.chat_store import ChatStore, Conversation, ConversationBusyError
+from backend.circuit_breaker import CircuitBreaker
+from backend.fake_llm import FakeGeminiModel
+from backend.main import app
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeGeminiModel(latency_ms=0, jitter_ms=0, chunk_delay_ms=0, complete_after=10)
+    monkeypatch.setattr(llm_service, "get_gemini_model", lambda: model)
+    monkeypatch.setattr(llm_service, "gemini_breaker", CircuitBreaker("chat-test"))
+    return model
+
+def _messages(*roles):
+    return [{"role": role, "content": f"m{i}"} for i, role in enumerate(roles)]
+
+def test_only_one_turn_at_a_time():
+    conversation = Conversation("c1", max_messages=10)
+    with conversation.turn():
+        assert conversation.busy
+        with pytest.raises(ConversationBusyError):
+            with conversation.turn():
+                pass
+    assert not conversation.busy
+
+def test_compaction_keeps_recent_turns_starting_on_a_user_message():
+    conversation = Conversation("c1", max_messages=4, messages=_messages("user", "assistant", "user", "assistant"))
+    conversation.chat = object()
+    conversation.append({"role": "user", "content": "next"})
+    assert [m["role"] for m in conversation.messages] == ["user", "assistant", "user"]
+    assert conversation.messages[-1]["content"] == "next"
+    assert conversation.chat is None
+
+def test_idle_and_least_recently_used_conversations_are_evicted(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(chat_store_module, "time", clock)
+    store = ChatStore(ttl_seconds=60, max_conversations=2)
+    a, b = store.create(), store.create()
+    clock.now += 30
+    assert store.get(a.id) is a
+    store.create()
+    assert store.get(b.id) is None  # least recently used
+    clock.now += 61
+    assert store.get(a.id) is None  # idle too long
+    assert len(store) == 0
+
+def test_converse_reuses_the_live_chat(fake_model):
+    conversation = Conversation("c1", max_messages=40)
+    llm_service.converse(conversation, "school was long")
+    chat = conversation.chat
+    assert chat is not None
+    llm_service.converse(conversation, "and practice too")
+    assert conversation.chat is chat
+    assert [m["role"] for m in conversation.messages] == ["user", "assistant"] * 2
+    assert len(chat.history) == len(conversation.messages)
+
+def test_abandoned_stream_drops_the_unanswered_message(fake_model):
+    conversation = Conversation("c1", max_messages=40)
+    events = llm_service.stream_conversation(conversation, "hello")
+    next(events)
+    assert conversation.busy
+    events.close()
+    assert conversation.messages == [] and not conversation.busy
+
+def test_chat_endpoint_keeps_the_conversation_server_side(fake_model):
+    client = TestClient(app)
+    first = client.post("/api/llm", json={"message": "hey"}).json()
+    conversation_id = first["conversation_id"]
+    second = client.post("/api/llm", json={"message": "still here", "conversation_id": conversation_id}).json()
+    assert second["conversation_id"] == conversation_id
+    assert len(chat_store_module.chat_store.get(conversation_id).messages) == 4
+
+    missing = client.post("/api/llm", json={"message": "hi", "conversation_id": "nope"})
+    assert missing.status_code == 404
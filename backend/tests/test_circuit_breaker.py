@@ -0,0 +1,113 @@
+import threading
+
+from backend import circuit_breaker, llm_service
+from backend.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def _breaker(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    options = {"window": 10, "min_calls": 4, "error_rate": 0.5, "slow_call_seconds": 1.0, "slow_rate": 0.75, "open_seconds": 30}
+    return CircuitBreaker("test", **{**options, **kwargs}), clock
+
+def _wait_for_probe():
+    for thread in threading.enumerate():
+        if thread.name == "test-probe":
+            thread.join(timeout=5)
+
+def test_trips_on_error_rate_once_min_calls_reached(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_failure()
+    # Below min_calls nothing trips, however bad the calls were
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_error_rate_below_threshold_stays_closed(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    for _ in range(3):
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_trips_on_slow_calls(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    breaker.record_success(0.2)
+    for _ in range(2):
+        breaker.record_success(1.5)
+    assert breaker.state == CLOSED
+    breaker.record_success(1.0)  # at the threshold counts as slow
+    assert breaker.state == OPEN
+
+def test_single_probe_closes_breaker(monkeypatch):
+    release = threading.Event()
+    probes = []
+
+    def probe():
+        probes.append(1)
+        release.wait(5)
+
+    breaker, clock = _breaker(monkeypatch, probe=probe)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 29
+    assert not breaker.allow() and probes == []
+
+    clock.now += 1
+    # Every caller keeps falling back while the one probe runs
+    assert [breaker.allow() for _ in range(5)] == [False] * 5
+    assert breaker.state == HALF_OPEN
+    release.set()
+    _wait_for_probe()
+    assert probes == [1]
+    assert breaker.state == CLOSED and breaker.allow()
+
+def test_failed_probe_doubles_open_period(monkeypatch):
+    def probe():
+        raise RuntimeError("still down")
+
+    breaker, clock = _breaker(monkeypatch, probe=probe, max_open_seconds=100)
+    for _ in range(4):
+        breaker.record_failure()
+
+    for expected in (60, 100, 100):
+        clock.now = breaker._open_until
+        assert not breaker.allow()
+        _wait_for_probe()
+        assert breaker.state == OPEN
+        assert breaker._open_until - clock.now == expected
+
+def test_trial_call_decides_without_probe(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN and not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+def test_open_breaker_serves_fallback_without_calling_model(monkeypatch):
+    class Unreachable:
+        def start_chat(self, *args, **kwargs):
+            raise AssertionError("model called while the breaker is open")
+
+    breaker, _ = _breaker(monkeypatch)
+    for _ in range(4):
+        breaker.record_failure()
+    monkeypatch.setattr(llm_service, "gemini_breaker", breaker)
+    monkeypatch.setattr(llm_service, "get_gemini_model", lambda: Unreachable())
+
+    reply = llm_service.simulate_llm_response([{"role": "user", "content": "hi"}])
+    assert reply == llm_service._fallback_response([{"role": "user", "content": "hi"}])
+    assert llm_service.generate_model_quiz_questions("exams") is None
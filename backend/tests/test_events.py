@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+from backend.events import EventBroker
+
+async def _take(events, count, timeout=1.0):
+    return [await asyncio.wait_for(events.__anext__(), timeout) for _ in range(count)]
+
+async def _subscribed(broker):
+    """Waits until a started subscribe() generator has registered with the broker."""
+    while not broker._subscribers:
+        await asyncio.sleep(0)
+
+def test_resume_replays_buffered_events():
+    broker = EventBroker(buffer_size=10)
+    first = broker.publish("created", {"n": 1})
+    broker.publish("completed", {"n": 2})
+    broker.publish("escalated", {"n": 3})
+
+    async def run():
+        events = broker.subscribe(first["id"], keepalive=5)
+        replayed = await _take(events, 2)
+        await events.aclose()
+        return replayed
+
+    replayed = asyncio.run(run())
+    assert [(e["type"], e["data"]["n"]) for e in replayed] == [("completed", 2), ("escalated", 3)]
+
+def test_resume_from_latest_event_replays_nothing():
+    broker = EventBroker(buffer_size=10)
+    last = broker.publish("created", {"n": 1})
+
+    async def run():
+        events = broker.subscribe(last["id"], keepalive=0.01)
+        # Nothing to replay: the first thing yielded is a keepalive
+        first = await _take(events, 1)
+        await events.aclose()
+        return first
+
+    assert asyncio.run(run()) == [None]
+
+def test_unknown_or_evicted_ids_get_a_reset():
+    broker = EventBroker(buffer_size=2)
+    first = broker.publish("created", {"n": 1})
+    for n in range(2, 5):
+        broker.publish("created", {"n": n})
+
+    async def run(last_event_id):
+        events = broker.subscribe(last_event_id, keepalive=5)
+        first_event = (await _take(events, 1))[0]
+        await events.aclose()
+        return first_event
+
+    # Evicted from the buffer: events in between are lost
+    assert asyncio.run(run(first["id"]))["type"] == "reset"
+    # From before a restart (other epoch), or malformed
+    assert asyncio.run(run("deadbeef-3"))["type"] == "reset"
+    assert asyncio.run(run(f"{broker.epoch}-x"))["type"] == "reset"
+    # The oldest event still buffered can be resumed from
+    assert asyncio.run(run(f"{broker.epoch}-2"))["data"] == {"n": 3}
+
+def test_live_events_from_other_threads_are_delivered_once_in_order():
+    broker = EventBroker(buffer_size=10)
+
+    async def run():
+        broker.bind(asyncio.get_running_loop())
+        events = broker.subscribe(None, keepalive=5)
+        pending = asyncio.ensure_future(_take(events, 3))
+        await _subscribed(broker)
+        publisher = threading.Thread(target=lambda: [broker.publish("created", {"n": n}) for n in range(3)])
+        publisher.start()
+        received = await pending
+        publisher.join()
+        await events.aclose()
+        return received
+
+    received = asyncio.run(run())
+    assert [e["data"]["n"] for e in received] == [0, 1, 2]
+    assert [e["seq"] for e in received] == sorted(e["seq"] for e in received)
+
+def test_slow_subscriber_gets_its_queue_then_is_disconnected():
+    broker = EventBroker(buffer_size=10, queue_size=2)
+
+    async def run():
+        broker.bind(asyncio.get_running_loop())
+        events = broker.subscribe(None, keepalive=5)
+        # Start the generator so the subscriber is registered, then overflow its queue
+        pending = asyncio.ensure_future(events.__anext__())
+        await _subscribed(broker)
+        for n in range(4):
+            broker.publish("created", {"n": n})
+        await asyncio.sleep(0)
+        received = [await pending]
+        async for event in events:
+            received.append(event)
+        return received
+
+    received = asyncio.run(run())
+    assert [e["data"]["n"] for e in received] == [0, 1]
+    assert broker._subscribers == []
@@ -0,0 +1,71 @@
+from backend import extraction
+from backend.extraction import (
+    Checkpoint, extract_batch, local_extract, pack_batches, reextract_chats, validate_extraction,
+)
+from backend.models import Session as DBSession
+
+def _chat(*texts):
+    return [("user", text) for text in texts]
+
+def test_validate_extraction_drops_bad_fields():
+    assert validate_extraction({
+        "mood_word": "  tired ", "mood_tone": "Negative", "sleep_hours": 30,
+        "main_stressor": "", "red_flag": "no",
+    }) == {"mood_word": "tired", "mood_tone": "negative"}
+    assert validate_extraction({"sleep_hours": True}) is None
+    assert validate_extraction(["not", "a", "dict"]) is None
+
+def test_local_extract():
+    assert local_extract(_chat("honestly pretty tired, slept 5 hours", "exams are next week")) == {
+        "red_flag": False, "mood_word": "tired", "mood_tone": "neutral", "sleep_hours": 5.0, "main_stressor": "exams",
+    }
+    flagged = local_extract(_chat("I feel great but sometimes I want to die"))
+    assert (flagged["red_flag"], flagged["mood_tone"]) == (True, "negative")
+    # Only the teen's messages count
+    assert local_extract([("assistant", "are you feeling hopeless?"), ("user", "no, fine")])["red_flag"] is False
+
+def test_pack_batches_respects_count_and_size():
+    items = [(f"s{i}", _chat("x" * length)) for i, length in enumerate([10, 10, 10, 50, 10])]
+    batches = pack_batches(items, batch_size=2, max_chars=40)
+    assert [[sid for sid, _ in batch] for batch in batches] == [["s0", "s1"], ["s2"], ["s3"], ["s4"]]
+
+def test_invalid_or_missing_model_answers_fall_back_to_local(monkeypatch):
+    prompts = []
+
+    def fake_model(prompt):
+        prompts.append(prompt)
+        return {"a": {"mood_word": "calm", "mood_tone": "positive", "red_flag": False}, "b": {"mood_tone": "furious"}}
+
+    monkeypatch.setattr(extraction, "generate_model_extractions", fake_model)
+    results = extract_batch([("a", _chat("ok")), ("b", _chat("bad day")), ("c", _chat("school"))])
+    assert len(prompts) == 1 and "### a" in prompts[0] and "### c" in prompts[0]
+    assert results["a"] == ({"mood_word": "calm", "mood_tone": "positive", "red_flag": False}, "model")
+    assert results["b"][1] == results["c"][1] == "local"
+    assert results["b"][0]["mood_tone"] == "negative"
+
+def test_reextract_resumes_from_checkpoint_and_keeps_existing_values(db, tmp_path):
+    sessions = [
+        DBSession(id=f"s{i}", participant_id="p1", source="chat", raw_data={
+            "chat_transcript": [{"role": "user", "text": f"school was rough, slept {i + 4} hours"}],
+            "llm_extracted": {"mood_word": "drained"} if i == 0 else {},
+        })
+        for i in range(3)
+    ]
+    sessions.append(DBSession(id="s9", participant_id="p1", source="quiz", raw_data={}))
+    db.add_all(sessions)
+    db.commit()
+
+    path = str(tmp_path / "checkpoint.json")
+    counts = reextract_chats(db, Checkpoint(path), chunk_size=10, use_model=False, limit=2)
+    assert counts["local"] == 2
+    assert Checkpoint(path).last_id == "s1"
+
+    counts = reextract_chats(db, Checkpoint(path), chunk_size=10, use_model=False)
+    assert counts["local"] == 3
+
+    db.expire_all()
+    first = db.get(DBSession, "s0")
+    assert first.raw_data["llm_extracted"]["mood_word"] == "drained"
+    assert first.raw_data["llm_extracted"]["sleep_hours"] == 4
+    assert first.report["clinical_notes"] == first.raw_data["llm_extracted"]
+    assert db.get(DBSession, "s9").report is None
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from backend.ingest import BulkIngestor, iter_ndjson
+from backend.main import app
+from backend.models import Session as DBSession, ScoringJob
+from backend.tests.helpers import quiz_raw_data
+from backend.trends import query_trends
+
+def _item(participant_id="p1", reaction_times=(400, 520, 610)):
+    return {"participant_id": participant_id, "source": "quiz", "raw_data": quiz_raw_data(reaction_times, choices=["calm"])}
+
+def test_ndjson_lines_split_across_chunks():
+    async def chunks():
+        yield b'{"a": 1}\n{"b"'
+        yield b': 2}\n\nnot json\n{"c": 3}'
+
+    async def collect():
+        return [entry async for entry in iter_ndjson(chunks())]
+
+    parsed = asyncio.run(collect())
+    assert [item for item, _ in parsed] == [{"a": 1}, {"b": 2}, None, {"c": 3}]
+    assert parsed[2][1].startswith("Invalid JSON")
+
+def test_batches_insert_sessions_and_queue_scoring(db):
+    ingestor = BulkIngestor(db, batch_size=2)
+    ingestor.add_many([(_item(), None), ({"source": "quiz"}, None), (_item("p2"), None), (_item("p3"), None)])
+    ingestor.flush()
+
+    summary = ingestor.summary()
+    assert (summary["created"], summary["failed"]) == (3, 1)
+    assert summary["results"][1]["error"].startswith("participant_id")
+    ids = [r["session_id"] for r in summary["results"] if "session_id" in r]
+    assert sorted(db.exec(select(ScoringJob.session_id)).all()) == sorted(ids)
+    assert ingestor.queued
+
+def test_scored_ingest_updates_trends_in_the_same_commit(db):
+    ingestor = BulkIngestor(db, score=True, batch_size=2)
+    ingestor.add_many([(_item(), None), (_item(), None), (_item("p2"), None)])
+    ingestor.flush()
+
+    assert ingestor.summary()["created"] == 3
+    assert all(s.report for s in db.exec(select(DBSession)).all())
+    assert sum(t["sessions"] for t in query_trends(db)) == 3
+    assert db.exec(select(ScoringJob)).all() == []
+
+def test_scoring_error_fails_only_that_item(db):
+    client = TestClient(app)
+    items = [_item(), _item(reaction_times=["x"]), _item("p2")]
+    response = client.post("/api/sessions/bulk?score=true", content=json.dumps(items), headers={"content-type": "application/json"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 1)
+    assert body["results"][1]["index"] == 1
+    assert body["results"][1]["error"].startswith("Scoring failed")
+    assert len(db.exec(select(DBSession)).all()) == 2
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from backend import jobs
+from backend.database import engine
+from backend.jobs import ScoringQueue
+from backend.models import Session as DBSession, ScoringJob, TrendRollup
+from backend.tests.helpers import quiz_raw_data
+
+def _add_session(db, **fields):
+    session = DBSession(participant_id="p1", source="quiz", raw_data=quiz_raw_data([400, 520], choices=["calm"]), **fields)
+    db.add(session)
+    return session
+
+def _job(db, session_id):
+    db.expire_all()
+    return db.get(ScoringJob, session_id)
+
+def test_job_is_scored_once_claimed(db):
+    queue = ScoringQueue(engine, workers=1)
+    session = _add_session(db)
+    queue.enqueue(db, [session.id])
+    db.commit()
+
+    assert queue._claim() == session.id
+    assert _job(db, session.id).status == "running"
+    # A running job can't be claimed again
+    assert queue._claim() is None
+
+    queue._run(session.id)
+    assert _job(db, session.id).status == "done"
+    assert db.get(DBSession, session.id).report["stress_label"]
+
+def test_failures_are_retried_with_backoff_then_fail(db, monkeypatch):
+    queue = ScoringQueue(engine, workers=1, max_attempts=2)
+    session = _add_session(db)
+    queue.enqueue(db, [session.id])
+    db.commit()
+
+    def broken(_session_data):
+        raise RuntimeError("scoring exploded")
+    monkeypatch.setattr(jobs, "generate_summary", broken)
+
+    queue._run(queue._claim())
+    job = _job(db, session.id)
+    assert (job.status, job.attempts, job.last_error) == ("pending", 1, "scoring exploded")
+    assert job.run_after > datetime.utcnow()
+    # Not due yet
+    assert queue._claim() is None
+
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.add(job)
+    db.commit()
+    queue._run(queue._claim())
+    job = _job(db, session.id)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert db.get(DBSession, session.id).report is None
+
+def test_missing_session_fails_without_retrying(db):
+    queue = ScoringQueue(engine, workers=1, max_attempts=3)
+    db.add(ScoringJob(session_id="gone"))
+    db.commit()
+    queue._run(queue._claim())
+    job = _job(db, "gone")
+    assert (job.status, job.attempts) == ("failed", 1)
+
+def test_running_a_job_twice_is_harmless(db):
+    queue = ScoringQueue(engine, workers=1)
+    session = _add_session(db)
+    queue.enqueue(db, [session.id])
+    db.commit()
+
+    queue._run(session.id)
+    db.expire_all()
+    first_report = db.get(DBSession, session.id).report
+    # e.g. a crash after scoring but before the job was marked done
+    queue._run(session.id)
+    db.expire_all()
+
+    assert db.get(DBSession, session.id).report == first_report
+    rollups = db.exec(select(TrendRollup).where(TrendRollup.participant_id == "")).all()
+    assert {r.bucket: r.session_count for r in rollups} == {"day": 1, "week": 1}
+
+def test_enqueue_keeps_one_job_per_session_and_requeues_finished_ones(db):
+    queue = ScoringQueue(engine, workers=1)
+    session = _add_session(db)
+    queue.enqueue(db, [session.id])
+    queue.enqueue(db, [session.id])
+    db.commit()
+    assert len(db.exec(select(ScoringJob)).all()) == 1
+
+    queue._run(queue._claim())
+    queue.enqueue(db, [session.id])
+    db.commit()
+    job = _job(db, session.id)
+    assert (job.status, job.attempts) == ("pending", 0)
+
+def test_watch_is_set_from_the_worker_thread(db):
+    queue = ScoringQueue(engine, workers=1)
+    session = _add_session(db)
+    queue.enqueue(db, [session.id])
+    db.commit()
+
+    async def run():
+        finished = queue.watch(session.id)
+        worker = threading.Thread(target=lambda: (queue._run(queue._claim()), queue._finished(session.id)))
+        worker.start()
+        await asyncio.wait_for(finished.wait(), 5)
+        worker.join()
+        queue.unwatch(session.id, finished)
+
+    asyncio.run(run())
+    assert queue._waiters == {}
+    assert _job(db, session.id).status == "done"
+
+def test_empty_report_counts_as_scored(db):
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    # Sources with nothing to score get an empty report; it must not be re-queued forever
+    session = DBSession(participant_id="p1", source="kiosk")
+    session.apply_report(jobs.generate_summary({"source": "kiosk", "raw_data": {}}))
+    db.add(session)
+    db.commit()
+    assert session.report == {}
+
+    client = TestClient(app)
+    response = client.post(f"/api/session/{session.id}/complete")
+    assert (response.status_code, response.json()) == (200, {})
+    assert client.get(f"/api/session/{session.id}/report.html").status_code == 200
+    assert _job(db, session.id) is None
@@ -0,0 +1,64 @@
+from backend.lexicon import Lexicon, NEGATIVE_LEXICON, RED_FLAG_LEXICON
+
+def test_terms_match_whole_words_only():
+    assert RED_FLAG_LEXICON.contains("I cut myself")
+    assert RED_FLAG_LEXICON.contains("Cut.")
+    assert not RED_FLAG_LEXICON.contains("I took a shortcut home")
+    assert not RED_FLAG_LEXICON.contains("we execute the plan")
+    assert not RED_FLAG_LEXICON.contains("haircuts are expensive")
+
+def test_phrases_match_any_whitespace_and_case():
+    hits = RED_FLAG_LEXICON.scan("sometimes I want   to\nDIE")
+    assert [h.term for h in hits] == ["want to die"]
+
+def test_longest_term_wins():
+    lexicon = Lexicon(["no", "no hope"])
+    assert [h.term for h in lexicon.scan("there is no hope")] == ["no hope"]
+
+def test_scan_transcript_offsets_and_roles():
+    messages = [
+        {"role": "user", "content": "school was fine"},
+        {"role": "assistant", "content": "do you ever think about cutting?"},
+        {"role": "user", "content": "I feel hopeless lately"},
+    ]
+    hits = RED_FLAG_LEXICON.scan_transcript(messages)
+    assert [(h.term, h.message_index) for h in hits] == [("hopeless", 2)]
+    hit = hits[0]
+    assert messages[2]["content"][hit.start:hit.end] == "hopeless"
+
+    all_roles = RED_FLAG_LEXICON.scan_transcript(messages, role=None)
+    assert [(h.term, h.message_index) for h in all_roles] == [("cutting", 1), ("hopeless", 2)]
+
+def test_scan_transcript_does_not_match_across_messages():
+    messages = [{"role": "user", "content": "I want to kill"}, {"role": "user", "content": "myself a sandwich"}]
+    assert RED_FLAG_LEXICON.scan_transcript(messages) == []
+
+def test_scan_transcript_custom_key():
+    messages = [{"role": "user", "text": "I overdosed once"}]
+    assert [h.term for h in RED_FLAG_LEXICON.scan_transcript(messages, key="text")] == ["overdosed"]
+
+# Inflections of the red-flag words the old substring check ("flag in text") caught
+BASELINE_RED_FLAG_FORMS = [
+    "suicidal", "suicidally", "kill myself", "want to die", "cut", "cuts", "cutting", "cutter",
+    "cutters", "overdose", "overdoses", "overdosed", "harm myself", "hopeless",
+    "hopelessly", "hopelessness", "no hope", "no hopes", "plan to",
+]
+
+BASELINE_NEGATIVE_FORMS = [
+    "sad", "sadly", "sadness", "angry", "hopeless", "hopelessly", "hopelessness", "rough",
+    "rougher", "roughest", "bad", "badly",
+]
+
+def test_red_flag_lexicon_keeps_baseline_recall():
+    baseline = ["suicidal", "kill myself", "want to die", "cut", "overdose", "harm myself", "hopeless", "no hope", "plan to"]
+    for form in BASELINE_RED_FLAG_FORMS:
+        text = f"honestly I feel {form} sometimes"
+        assert any(flag in text for flag in baseline), form
+        assert RED_FLAG_LEXICON.contains(text), form
+
+def test_negative_lexicon_keeps_baseline_recall():
+    baseline = ["sad", "angry", "hopeless", "rough", "bad"]
+    for form in BASELINE_NEGATIVE_FORMS:
+        text = f"today was {form}"
+        assert any(word in text for word in baseline), form
+        assert NEGATIVE_LEXICON.contains(text), form
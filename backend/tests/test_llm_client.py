@@ -0,0 +1,132 @@
+import asyncio
+import gc
+import threading
+
+import pytest
+
+from backend.llm_client import LLMClient, LLMSaturatedError
+
+def _wait_until(condition, timeout=2.0):
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.01)
+    return asyncio.wait_for(wait(), timeout)
+
+def test_calls_release_their_slot():
+    client = LLMClient(max_concurrency=1, max_queue=0)
+    try:
+        assert asyncio.run(client.call(lambda x: x * 2, 21)) == 42
+        assert client.pending == 0
+    finally:
+        client.shutdown()
+
+def test_saturation_is_rejected_and_timed_out_calls_keep_their_slot():
+    client = LLMClient(max_concurrency=1, max_queue=1, timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await client.call(release.wait)
+        # The worker is still blocked, so the timed-out call still counts
+        assert client.pending == 1
+        queued = client.submit(lambda: "queued")
+        assert client.pending == 2
+        with pytest.raises(LLMSaturatedError):
+            client.submit(lambda: "rejected")
+        release.set()
+        assert await asyncio.wrap_future(queued) == "queued"
+        await _wait_until(lambda: client.pending == 0)
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        client.shutdown()
+
+def test_stream_that_is_never_iterated_holds_nothing():
+    client = LLMClient(max_concurrency=1, max_queue=0)
+    started = []
+
+    def generate():
+        started.append(True)
+        yield "token"
+
+    try:
+        stream = client.stream(generate)
+        del stream
+        gc.collect()
+        assert client.pending == 0
+        assert started == []
+    finally:
+        client.shutdown()
+
+def test_stream_holds_its_slot_while_iterating_and_releases_it_after():
+    client = LLMClient(max_concurrency=1, max_queue=0)
+
+    async def run():
+        items = []
+        async for item in client.stream(lambda: iter(["a", "b"])):
+            items.append(item)
+            assert client.pending == 1
+            with pytest.raises(LLMSaturatedError):
+                client.stream(lambda: iter([]))
+        assert items == ["a", "b"]
+        assert client.pending == 0
+
+    try:
+        asyncio.run(run())
+    finally:
+        client.shutdown()
+
+def test_stream_timeout_keeps_the_slot_until_the_worker_returns_then_closes_the_generator():
+    client = LLMClient(max_concurrency=1, max_queue=0, timeout=0.05)
+    release = threading.Event()
+    closed = threading.Event()
+
+    def generate():
+        try:
+            yield "first"
+            release.wait()
+            yield "second"
+        finally:
+            closed.set()
+
+    async def run():
+        events = client.stream(generate)
+        assert await events.__anext__() == "first"
+        with pytest.raises(asyncio.TimeoutError):
+            await events.__anext__()
+        assert client.pending == 1
+        assert not closed.is_set()
+        release.set()
+        await _wait_until(lambda: client.pending == 0)
+        assert closed.is_set()
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        client.shutdown()
+
+def test_abandoned_stream_is_closed_and_released():
+    client = LLMClient(max_concurrency=1, max_queue=0)
+    closed = threading.Event()
+
+    def generate():
+        try:
+            yield "first"
+            yield "second"
+        finally:
+            closed.set()
+
+    async def run():
+        events = client.stream(generate)
+        assert await events.__anext__() == "first"
+        await events.aclose()  # e.g. the client disconnected
+        await _wait_until(lambda: client.pending == 0)
+        assert closed.is_set()
+
+    try:
+        asyncio.run(run())
+    finally:
+        client.shutdown()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.models import Session as DBSession
+
+@pytest.fixture
+def client():
+    # Not used as a context manager: the endpoints tested don't need the startup hooks
+    return TestClient(app)
+
+@pytest.fixture
+def sessions(db):
+    start = datetime(2026, 5, 1, 12, 0, 0)
+    rows = []
+    for i in range(7):
+        # Pairs of sessions share a timestamp, so the id has to break ties
+        rows.append(DBSession(
+            id=f"s{i:02d}", participant_id="p1" if i % 3 else "p2", source="quiz",
+            urgency="urgent" if i % 2 else "monitor", created_at=start + timedelta(minutes=i // 2),
+        ))
+    db.add_all(rows)
+    db.commit()
+    return sorted(rows, key=lambda s: (s.created_at, s.id))
+
+def _walk(client, url, **params):
+    ids, cursor = [], None
+    while True:
+        page = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        items = page["items"]
+        ids.extend(item["id"] for item in items)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+        assert len(items) == params["limit"]
+
+def test_summary_pages_cover_every_session_once_newest_first(client, sessions):
+    ids = _walk(client, "/api/sessions/summary", limit=2)
+    assert ids == [s.id for s in reversed(sessions)]
+
+def test_summary_pages_respect_filters(client, sessions):
+    ids = _walk(client, "/api/sessions/summary", limit=1, urgency="urgent")
+    assert ids == [s.id for s in reversed(sessions) if s.urgency == "urgent"]
+
+def test_timeline_pages_cover_the_participant_oldest_first(client, sessions):
+    ids = _walk(client, "/api/participants/p1/timeline", limit=2)
+    assert ids == [s.id for s in sessions if s.participant_id == "p1"]
+
+def test_exact_page_size_has_no_next_cursor(client, sessions):
+    page = client.get("/api/sessions/summary", params={"limit": len(sessions)}).json()
+    assert len(page["items"]) == len(sessions)
+    assert page["next_cursor"] is None
+
+def test_invalid_cursor_is_rejected(client, sessions):
+    response = client.get("/api/sessions/summary", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,69 @@
+import json
+import time
+
+from backend.quiz_cache import QuizCache, normalize_context
+
+def _question(text):
+    return [{"text": text, "options": [{"label": "ok", "type": "Calm"}]}]
+
+def _wait_for_refill(cache, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while cache._refilling and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_normalize_context():
+    assert normalize_context("  Exams, STRESS!  ") == "exams stress"
+    assert normalize_context(None) == ""
+
+def test_cold_miss_schedules_refill_then_serves_pool():
+    calls = []
+
+    def generate(context):
+        calls.append(context)
+        return _question(f"q{len(calls)}")
+
+    cache = QuizCache(generate, pool_size=3)
+    assert cache.get("Exams") is None
+    _wait_for_refill(cache)
+    assert calls == ["Exams"] * 3
+
+    # Sets rotate, but the last one is kept to serve until the next refill
+    served = [cache.get("exams!")[0]["text"] for _ in range(2)]
+    assert served == ["q1", "q2"]
+
+def test_refill_stops_when_model_unavailable():
+    calls = []
+
+    def generate(context):
+        calls.append(context)
+        return None
+
+    cache = QuizCache(generate, pool_size=3)
+    assert cache.get("sleep") is None
+    _wait_for_refill(cache)
+    assert calls == ["sleep"]
+    assert cache._entries == {}
+
+def test_expired_sets_are_dropped():
+    cache = QuizCache(lambda context: None, ttl_seconds=60)
+    cache.put("x", _question("old"))
+    cache._entries["x"][0][0] -= 120
+    assert cache.get("x") is None
+
+def test_least_recently_used_context_is_evicted():
+    cache = QuizCache(lambda context: None, max_entries=2)
+    cache.put("a", _question("a"))
+    cache.put("b", _question("b"))
+    cache.get("a")
+    cache.put("c", _question("c"))
+    assert list(cache._entries) == ["a", "c"]
+
+def test_persists_and_reloads(tmp_path):
+    path = str(tmp_path / "quiz.json")
+    cache = QuizCache(lambda context: None, path=path)
+    cache.put("Family", _question("saved"))
+    with open(path) as f:
+        assert list(json.load(f)) == ["family"]
+
+    reloaded = QuizCache(lambda context: None, path=path)
+    assert reloaded.get("family")[0]["text"] == "saved"
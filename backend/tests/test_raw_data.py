@@ -0,0 +1,77 @@
+import copy
+from datetime import datetime, timedelta
+
+from backend.models import Session as DBSession, SessionArchive, SessionTelemetry
+from backend.raw_data import (
+    archive_sessions, decode_series, encode_series, load_raw_data, load_raw_data_many,
+    merge_raw_data, pack_session, split_raw_data,
+)
+from backend.tests.helpers import quiz_raw_data
+
+def test_series_round_trip():
+    for values in ([300, 512, 1], [-40000, 70000], [2 ** 40, -1], [301.5, 0.25], ["calm", "impulsive", "avoidant"]):
+        assert decode_series(encode_series(values)) == values
+
+def test_series_that_cannot_be_packed_losslessly():
+    assert encode_series([]) is None
+    assert encode_series([1, 2.5]) is None
+    assert encode_series(["calm", "panicked"]) is None
+    assert encode_series([True, False]) is None
+    assert encode_series([2 ** 70]) is None
+
+def test_split_and_merge_round_trip():
+    raw = quiz_raw_data([412, 388, 530], misses=1, choices=["calm", "impulsive"])
+    raw["chat_transcript"] = [{"role": "user", "text": "hi"}]
+    original = copy.deepcopy(raw)
+
+    stripped, packed = split_raw_data(raw)
+    assert raw == original  # input untouched
+    assert set(packed) == {"reaction_times", "choice_times", "choices"}
+    assert "reaction_times" not in stripped["quiz"]["reaction"]
+    assert merge_raw_data(stripped, SessionTelemetry(session_id="x", **packed)) == original
+
+def test_stored_session_round_trip(db):
+    raw = quiz_raw_data([412, 388, 530], choices=["calm", "impulsive"])
+    session = DBSession(participant_id="p1", source="quiz", raw_data=copy.deepcopy(raw))
+    db.add(session)
+    db.add(pack_session(session))
+    db.commit()
+    db.expire_all()
+
+    session = db.get(DBSession, session.id)
+    assert "reaction_times" not in session.raw_data["quiz"]["reaction"]
+    assert load_raw_data(db, session) == raw
+    assert load_raw_data_many(db, [session]) == [raw]
+
+def test_archive_and_restore(db):
+    now = datetime.utcnow()
+    raws = {}
+    for i, age_days in enumerate([400, 300, 10]):
+        raw = quiz_raw_data([300 + i, 450], misses=i, choices=["avoidant"])
+        session = DBSession(participant_id=f"p{i}", source="quiz", raw_data=copy.deepcopy(raw), created_at=now - timedelta(days=age_days))
+        db.add(session)
+        telemetry = pack_session(session)
+        if telemetry is not None:
+            db.add(telemetry)
+        raws[session.id] = (raw, age_days)
+    db.commit()
+
+    archived = archive_sessions(db, now - timedelta(days=180), codec="zlib", chunk_size=1)
+    assert archived == 2
+    db.expire_all()
+
+    sessions = [db.get(DBSession, session_id) for session_id in raws]
+    for session in sessions:
+        raw, age_days = raws[session.id]
+        if age_days > 180:
+            assert session.raw_data == {}
+            assert session.raw_data_archived_at is not None
+            assert db.get(SessionArchive, session.id) is not None
+            assert db.get(SessionTelemetry, session.id) is None
+        else:
+            assert session.raw_data_archived_at is None
+        assert load_raw_data(db, session) == raw
+    assert load_raw_data_many(db, sessions) == [raws[s.id][0] for s in sessions]
+
+    # Already archived sessions are left alone
+    assert archive_sessions(db, now - timedelta(days=180), codec="zlib") == 0
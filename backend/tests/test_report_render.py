@@ -0,0 +1,67 @@
+import os
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.models import Session as DBSession
+from backend.report_render import ReportRenderer, report_hash
+
+def _session(**fields):
+    session = DBSession(**{"id": "s1", "participant_id": "p1", "source": "quiz", "created_at": datetime(2026, 5, 1, 9, 30), **fields})
+    session.apply_report({"stress_score": 0.42, "stress_label": "Moderate", "attention_score": 0.8, "impulsivity": "Low"})
+    return session
+
+def test_hash_follows_rendered_fields_only():
+    session = _session()
+    digest = report_hash(session)
+    session.meta = {"age": 15}
+    session.raw_data = {"quiz": {}}
+    assert report_hash(session) == digest
+    session.apply_report({**session.report, "stress_label": "High"})
+    assert report_hash(session) != digest
+
+def test_rendered_html_is_cached_by_hash():
+    renderer = ReportRenderer(max_entries=1)
+    session = _session()
+    html, digest = renderer.render(session)
+    assert "p1" in html and "Moderate" in html
+    assert renderer.render(session, digest)[0] is html
+
+    other = _session(participant_id="p2")
+    renderer.render(other)
+    # Evicted by the newer report
+    assert renderer.render(session)[0] is not html
+
+def test_templates_load_outside_the_backend_directory(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        assert "p1" in ReportRenderer().render(_session())[0]
+    finally:
+        os.chdir(cwd)
+
+def test_preview_revalidates_with_etag(db):
+    session = _session()
+    db.add(session)
+    db.commit()
+    client = TestClient(app)
+
+    response = client.get("/api/session/s1/report.html")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/session/s1/report.html", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    session.apply_report({**session.report, "stress_label": "High"})
+    db.add(session)
+    db.commit()
+    changed = client.get("/api/session/s1/report.html", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+def test_preview_of_unknown_session_is_404(db):
+    assert TestClient(app).get("/api/session/nope/report.html").status_code == 404
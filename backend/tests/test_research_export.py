@@ -0,0 +1,53 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import Session as DBSession
+from backend.research_export import EXPORT_COLUMNS, _coerce, iter_csv, iter_export_chunks
+from backend.scoring import generate_summary, quiz_features
+from backend.tests.helpers import quiz_raw_data
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), ("true", True), ("False", False), ("1", True), ("0", False),
+    (1, True), (0, False), ("false ", False), ("yes", None), (2, None), ("", None), ([], None),
+])
+def test_coerce_bool(value, expected):
+    assert _coerce(value, "bool") is expected
+
+@pytest.mark.parametrize("value, expected", [
+    (3, 3), (3.0, 3), ("3", 3), ("3.0", 3), (" 14 ", 14), (3.7, None), ("3.7", None),
+    ("abc", None), (True, None), (float("inf"), None), (float("nan"), None),
+])
+def test_coerce_int(value, expected):
+    assert _coerce(value, "int") == expected
+
+def test_coerce_float_and_str():
+    assert _coerce("7.5", "float") == 7.5
+    assert _coerce("lots", "float") is None
+    assert _coerce(15, "str") == "15"
+    assert _coerce(None, "int") is None
+
+def test_export_rows_in_created_order(db):
+    start = datetime(2026, 5, 1)
+    raw = quiz_raw_data([400, 520, 610], choices=["impulsive", "calm"])
+    quiz = DBSession(id="b", participant_id="p1", source="quiz", created_at=start + timedelta(hours=1),
+                     meta={"age": 15}, raw_data=raw)
+    quiz.apply_report(generate_summary({"source": "quiz", "raw_data": raw}))
+    chat = DBSession(id="a", participant_id="p2", source="chat", created_at=start,
+                     raw_data={"llm_extracted": {"mood_word": "tired", "red_flag": False}})
+    db.add_all([quiz, chat])
+    db.commit()
+
+    rows = [row for chunk in iter_export_chunks(db, chunk_size=1) for row in chunk]
+    assert [r["session_id"] for r in rows] == ["a", "b"]
+    assert rows[0]["chat_mood_word"] == "tired"
+    assert rows[0]["quiz_mean_rt"] is None
+    assert rows[1]["quiz_mean_rt"] == quiz_features(raw["quiz"])["mean_rt"]
+    assert rows[1]["meta_age"] == 15
+
+    text = "".join(iter_csv(iter(iter_export_chunks(db, source="quiz"))))
+    parsed = list(csv.DictReader(io.StringIO(text)))
+    assert list(parsed[0]) == EXPORT_COLUMNS
+    assert [r["session_id"] for r in parsed] == ["b"]
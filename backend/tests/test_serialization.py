@@ -0,0 +1,55 @@
+import json
+from datetime import date, datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.models import Session as DBSession
+from backend.serialization import FastJSONResponse, SessionPayloadCache, dumps
+
+def _payload(**report):
+    session = DBSession(
+        id="abc123", participant_id="anon_ü", source="both", urgency="urgent",
+        created_at=datetime(2026, 3, 1, 9, 30, 15, 123456),
+        meta={"age": 15, "mood_emoji": "😟", "sleep_hours": 6.5},
+        report=report or None, stress_score=report.get("stress_score"),
+    )
+    raw_data = {"quiz": {"reaction": {"reaction_times": [412, 388.25], "misses": 0}}, "chat_transcript": [{"role": "user", "text": "ça va \"meh\"\n"}]}
+    return {**session.model_dump(), "raw_data": raw_data}
+
+def _fastapi_default(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+def test_matches_fastapi_default_json():
+    for payload in (_payload(), _payload(stress_score=0.65, stress_label="Moderate", clinical_notes={"red_flag": True})):
+        assert json.loads(dumps(payload)) == json.loads(_fastapi_default(payload))
+        assert FastJSONResponse(payload).body == dumps(payload)
+
+def test_datetimes_and_dates_match_jsonable_encoder():
+    content = {"at": datetime(2026, 1, 2, 3, 4, 5), "micro": datetime(2026, 1, 2, 3, 4, 5, 60), "day": date(2026, 1, 2)}
+    assert json.loads(dumps(content)) == jsonable_encoder(content)
+
+def test_cache_reuses_encoding_only_while_payload_is_unchanged():
+    cache = SessionPayloadCache(max_entries=2)
+    payload = _payload(stress_score=0.65, stress_label="Moderate")
+    encoded = cache.encode(payload)
+    assert cache.encode(dict(payload)) is encoded
+
+    # e.g. an escalation or re-score made elsewhere
+    changed = {**payload, "urgency": "monitor"}
+    assert json.loads(cache.encode(changed))["urgency"] == "monitor"
+
+def test_cache_skips_sessions_without_a_report_and_evicts_lru():
+    cache = SessionPayloadCache(max_entries=2)
+    cache.encode(_payload())
+    assert len(cache._entries) == 0
+
+    for session_id in ("a", "b", "c"):
+        cache.encode({**_payload(stress_score=0.5), "id": session_id})
+    assert list(cache._entries) == ["b", "c"]
+
+def test_encode_list_is_a_json_array_of_payloads():
+    cache = SessionPayloadCache()
+    payloads = [_payload(stress_score=0.3), {**_payload(), "id": "other"}]
+    assert json.loads(cache.encode_list(payloads)) == json.loads(_fastapi_default(payloads))
+    assert json.loads(cache.encode_list([])) == []
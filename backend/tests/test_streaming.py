@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import llm_service
+from backend.circuit_breaker import CircuitBreaker
+from backend.fake_llm import FAKE_COMPLETION, FakeResponse
+from backend.main import app
+
+class ScriptedModel:
+    """Replies to every message with the given chunks; a chunk that is an exception is raised mid-stream."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def start_chat(self, history=None):
+        return self
+
+    def send_message(self, content, stream=False, **kwargs):
+        return _Stream(self.chunks, content)
+
+class _Stream:
+    def __init__(self, chunks, prompt):
+        self.chunks = chunks
+        self.usage_metadata = FakeResponse("".join(c for c in chunks if isinstance(c, str)), prompt).usage_metadata
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield FakeResponse(chunk)
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(llm_service, "gemini_breaker", CircuitBreaker("stream-test"))
+
+    def use(chunks):
+        scripted = ScriptedModel(chunks)
+        monkeypatch.setattr(llm_service, "get_gemini_model", lambda: scripted)
+        return scripted
+    return use
+
+def _stream(messages):
+    return list(llm_service.stream_llm_response(messages))
+
+def test_json_block_is_never_streamed_even_when_the_fence_is_split(model):
+    block = json.dumps(FAKE_COMPLETION)
+    model(["Thanks for ", "sharing. Take care!\n`", "`", "`json\n", block, "\n```"])
+    events = _stream([{"role": "user", "content": "bye"}])
+
+    tokens = [e["content"] for e in events if e["type"] == "token"]
+    assert not any("`" in token for token in tokens)
+    final = events[-1]
+    assert final["type"] == "final" and [e["type"] for e in events].count("final") == 1
+    assert final["content"] == "Thanks for sharing. Take care!"
+    assert "".join(tokens).strip() == final["content"]
+    assert final["extracted_json"] == FAKE_COMPLETION
+
+def test_red_flag_message_streams_the_escalation_without_the_model(model):
+    scripted = model(["should not be used"])
+    scripted.send_message = None
+    events = _stream([{"role": "user", "content": "I want to die"}])
+
+    final = events[-1]
+    assert final["extracted_json"]["urgency"] == "urgent"
+    assert "".join(e["content"] for e in events[:-1]) == final["content"]
+
+def test_failure_after_the_first_token_ends_with_an_error(model):
+    model(["I hear ", "you.", ConnectionError("reset")])
+    events = _stream([{"role": "user", "content": "hello"}])
+    # The partial reply stays as it is; no canned reply is spliced onto it
+    assert [e["type"] for e in events] == ["token", "token", "error"]
+
+def test_failure_before_any_token_falls_back(model):
+    model([ConnectionError("reset")])
+    events = _stream([{"role": "user", "content": "hello"}])
+    assert events[-1]["type"] == "final"
+    assert events[-1]["content"] == llm_service._fallback_response([{"role": "user", "content": "hello"}])["content"]
+
+def test_stream_endpoint_sends_server_sent_events(model):
+    model(["How was ", "your day?"])
+    client = TestClient(app)
+    response = client.post("/api/llm/stream", json={"messages": [{"role": "user", "content": "hey"}]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        assert name.startswith("event: ")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    assert [name for name, _ in events] == ["token", "token", "final"]
+    assert events[-1][1]["content"] == "How was your day?"
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from backend.models import Session as DBSession
+from backend.scoring import generate_summary
+from backend.session_reports import save_report
+from backend.tests.helpers import quiz_raw_data
+from backend.timeline import TIMELINE_FIELDS, TimelineWindow, rebuild_timelines, update_timeline
+
+def _timeline(db):
+    rows = db.exec(select(DBSession).order_by(DBSession.participant_id, DBSession.created_at, DBSession.id)).all()
+    for row in rows:
+        db.refresh(row)
+    return {row.id: tuple(getattr(row, f) for f in TIMELINE_FIELDS) for row in rows}
+
+def test_window_deltas_and_rolling_average():
+    window = TimelineWindow(size=2)
+    assert window.push(10, None) == {"stress_delta": None, "stress_avg": 10, "attention_delta": None, "attention_avg": None}
+    assert window.push(20, 5)["stress_delta"] == 10
+    values = window.push(40, 7)
+    assert values["stress_avg"] == 30
+    assert values["attention_delta"] == 2
+
+def test_out_of_order_scoring_matches_rebuild(db):
+    start = datetime(2026, 5, 1)
+    sessions = [
+        DBSession(id=f"s{i}", participant_id="p1" if i % 4 else "p2", source="quiz",
+                  created_at=start + timedelta(hours=i), raw_data=quiz_raw_data([300 + 40 * i, 500, 450 - 20 * i]))
+        for i in range(9)
+    ]
+    db.add_all(sessions)
+    db.commit()
+
+    # Score the sessions out of creation order, as the scoring workers do
+    for session in sessions[4:] + sessions[:4]:
+        save_report(db, session, generate_summary({"source": session.source, "raw_data": session.raw_data}))
+        db.commit()
+    incremental = _timeline(db)
+
+    rebuild_timelines(db)
+    db.commit()
+    assert incremental == _timeline(db)
+    assert incremental["s1"][0] is None  # p1's first scored session has no delta
+
+def test_unscored_session_has_empty_timeline(db):
+    session = DBSession(id="s0", participant_id="p1", source="quiz", stress_avg=1.0)
+    db.add(session)
+    db.commit()
+    update_timeline(db, session)
+    assert all(getattr(session, f) is None for f in TIMELINE_FIELDS)
+
+def test_report_save_locks_participant_rows_first(db, monkeypatch):
+    session = DBSession(id="s0", participant_id="p1", source="quiz", raw_data=quiz_raw_data([400, 420]))
+    db.add(session)
+    db.commit()
+
+    statements = []
+    exec_ = db.exec
+    monkeypatch.setattr(db, "exec", lambda statement, *a, **kw: statements.append(statement) or exec_(statement, *a, **kw))
+    save_report(db, session, generate_summary({"source": session.source, "raw_data": session.raw_data}))
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE" in sql and "participant_id" in sql
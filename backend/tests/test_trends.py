@@ -0,0 +1,76 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlmodel import Session, select
+
+from backend.database import engine
+from backend.models import Session as DBSession, TrendRollup
+from backend.scoring import generate_summary
+from backend.session_reports import save_report
+from backend.tests.helpers import quiz_raw_data
+from backend.trends import TrendDeltas, bucket_start, query_trends, rebuild_rollups
+
+def _rollups(db):
+    db.expire_all()
+    # Sums are rounded: adding and subtracting scores leaves float noise behind
+    return {
+        (r.bucket, r.bucket_start, r.participant_id): {k: round(v, 9) if isinstance(v, float) else v for k, v in r.model_dump().items()}
+        for r in db.exec(select(TrendRollup)).all()
+        if r.session_count
+    }
+
+def test_weeks_start_on_monday():
+    assert bucket_start("week", date(2026, 5, 7)) == date(2026, 5, 4)
+    assert bucket_start("day", date(2026, 5, 7)) == date(2026, 5, 7)
+
+def test_concurrent_flushes_do_not_lose_increments(db):
+    created_at = datetime(2026, 5, 6, 9, 0)
+    report = {"stress_score": 0.5, "attention_score": 0.25, "impulsivity": "Low"}
+    errors = []
+
+    def writer(n):
+        try:
+            for _ in range(n):
+                with Session(engine) as session:
+                    deltas = TrendDeltas()
+                    deltas.add(created_at, "p1", "monitor", report)
+                    deltas.flush(session)
+                    session.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(10,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    [week] = query_trends(db, "week")
+    assert week["sessions"] == 40
+    assert week["mean_stress"] == 0.5
+    assert week["impulsivity"]["Low"] == 40
+    assert query_trends(db, "day", participant_id="p1")[0]["sessions"] == 40
+
+def test_incremental_rollups_match_rebuild(db):
+    start = datetime(2026, 5, 1, 8, 0)
+    sessions = []
+    for i in range(6):
+        raw = quiz_raw_data([350 + 60 * i, 480, 700 - 30 * i], misses=i % 3, choices=["impulsive"] * (i % 3) + ["calm"])
+        sessions.append(DBSession(participant_id=f"p{i % 2}", source="quiz", raw_data=raw, created_at=start + timedelta(days=2 * i)))
+    db.add_all(sessions)
+    db.commit()
+
+    for session in sessions:
+        save_report(db, session, generate_summary({"source": "quiz", "raw_data": session.raw_data}))
+        db.commit()
+    # A re-score moves the session's contribution rather than adding a second one
+    save_report(db, sessions[0], {**sessions[0].report, "urgency": "urgent", "stress_score": 0.9})
+    db.commit()
+    incremental = _rollups(db)
+
+    rebuild_rollups(db)
+    assert _rollups(db) == incremental
+    overall = sum(r["session_count"] for key, r in incremental.items() if key[0] == "week" and key[2] == "")
+    assert overall == 6
+    assert sum(r["urgent_count"] for key, r in incremental.items() if key[0] == "day" and key[2] == "") == 1
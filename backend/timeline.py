@@ -0,0 +1,124 @@
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlmodel import Session, and_, or_, select, update
+
+from .models import Session as DBSession
+
+# Scored sessions (the current one included) covered by the rolling averages
+TIMELINE_WINDOW = int(os.environ.get("TIMELINE_WINDOW", 5))
+TIMELINE_FIELDS = ["stress_delta", "attention_delta", "stress_avg", "attention_avg"]
+
+class TimelineWindow:
+    """Running state over one participant's scored sessions, fed in time order."""
+
+    def __init__(self, size: int = TIMELINE_WINDOW):
+        self.stress = deque(maxlen=size)
+        self.attention = deque(maxlen=size)
+
+    def push(self, stress: Optional[float], attention: Optional[float]) -> Dict[str, Optional[float]]:
+        """Adds a session's scores and returns its timeline fields."""
+        values = {}
+        for name, series, value in (("stress", self.stress, stress), ("attention", self.attention, attention)):
+            if value is None:
+                values[f"{name}_delta"] = values[f"{name}_avg"] = None
+                continue
+            values[f"{name}_delta"] = value - series[-1] if series else None
+            series.append(value)
+            values[f"{name}_avg"] = sum(series) / len(series)
+        return values
+
+def lock_participant_timeline(db: Session, participant_id: str):
+    """
+    Row-locks a participant's sessions (SELECT ... FOR UPDATE) until the transaction ends, so
+    concurrent report saves for one participant update the timeline one after the other
+    instead of each reading the other's neighbours before they were scored. Call it before
+    changing any of the participant's sessions. SQLite has no row locks; there the first
+    write already serializes the transaction.
+    """
+    db.exec(
+        select(DBSession.id)
+        .where(DBSession.participant_id == participant_id)
+        .order_by(DBSession.id)
+        .with_for_update()
+    ).all()
+
+def update_timeline(db: Session, session: DBSession, window: int = TIMELINE_WINDOW):
+    """
+    Recomputes the timeline fields of a session whose report changed, and of the later
+    sessions of the same participant whose deltas or averages include it. Only sessions
+    within the window are read, so the cost doesn't grow with the participant's history.
+    The caller holds lock_participant_timeline() and commits.
+    """
+    scored = [DBSession.participant_id == session.participant_id, DBSession.stress_score.is_not(None)]
+    columns = (DBSession.id, DBSession.stress_score, DBSession.attention_score)
+    span = max(window - 1, 1)
+
+    before = db.exec(
+        select(*columns)
+        .where(*scored, or_(
+            DBSession.created_at < session.created_at,
+            and_(DBSession.created_at == session.created_at, DBSession.id < session.id),
+        ))
+        .order_by(DBSession.created_at.desc(), DBSession.id.desc())
+        .limit(span)
+    ).all()
+    after = db.exec(
+        select(*columns)
+        .where(*scored, or_(
+            DBSession.created_at > session.created_at,
+            and_(DBSession.created_at == session.created_at, DBSession.id > session.id),
+        ))
+        .order_by(DBSession.created_at, DBSession.id)
+        .limit(span)
+    ).all()
+
+    state = TimelineWindow(window)
+    for row in reversed(before):
+        state.push(row.stress_score, row.attention_score)
+
+    if session.stress_score is not None:
+        values = state.push(session.stress_score, session.attention_score)
+    else:
+        values = dict.fromkeys(TIMELINE_FIELDS)
+    for field, value in values.items():
+        setattr(session, field, value)
+    db.add(session)
+
+    if after:
+        db.exec(update(DBSession), params=[
+            {"id": row.id, **state.push(row.stress_score, row.attention_score)} for row in after
+        ])
+
+def rebuild_timelines(db: Session, participant_ids: Optional[Iterable[str]] = None, chunk_size: int = 1000) -> int:
+    """
+    Recomputes the timeline fields of every session, or only of the given participants,
+    e.g. after a bulk insert or re-score. Returns the number of scored sessions updated.
+    The caller commits.
+    """
+    scored = select(
+        DBSession.id, DBSession.participant_id, DBSession.stress_score, DBSession.attention_score
+    ).where(DBSession.stress_score.is_not(None))
+    cleared = update(DBSession).where(DBSession.stress_score.is_(None))
+    if participant_ids is not None:
+        participant_ids = list(participant_ids)
+        scored = scored.where(DBSession.participant_id.in_(participant_ids))
+        cleared = cleared.where(DBSession.participant_id.in_(participant_ids))
+    db.exec(cleared.values(**dict.fromkeys(TIMELINE_FIELDS)))
+
+    params: List[Dict[str, Any]] = []
+    participant, state = None, None
+    rows = db.exec(
+        scored.order_by(DBSession.participant_id, DBSession.created_at, DBSession.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in rows:
+        if row.participant_id != participant:
+            participant, state = row.participant_id, TimelineWindow()
+        params.append({"id": row.id, **state.push(row.stress_score, row.attention_score)})
+
+    # Written after the scan so the UPDATEs don't interleave with the open cursor
+    for i in range(0, len(params), chunk_size):
+        db.exec(update(DBSession), params=params[i:i + chunk_size])
+    return len(params)
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select, delete
+
+from .models import Session as DBSession, TrendRollup
+
+BUCKETS = ["day", "week"]
+IMPULSIVITY_FIELDS = {
+    "High": "impulsivity_high",
+    "Moderate": "impulsivity_moderate",
+    "Low": "impulsivity_low",
+    "Unknown": "impulsivity_unknown",
+}
+ROLLUP_KEYS = ["bucket", "bucket_start", "participant_id"]
+ROLLUP_FIELDS = [
+    "session_count", "urgent_count", "monitor_count", "stress_sum", "stress_count",
+    "attention_sum", "attention_count", *IMPULSIVITY_FIELDS.values(),
+]
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def bucket_start(bucket: str, day: date) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # weeks start on Monday
+    return day
+
+class TrendDeltas:
+    """
+    Accumulates rollup changes in memory so many sessions can be applied with one write per
+    touched bucket. Nothing is committed; flush() stages the rows on the caller's DB session.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[str, date, str], Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, created_at: datetime, participant_id: str, urgency: str, report: Optional[Dict[str, Any]], sign: int = 1):
+        """Adds (sign=1) or removes (sign=-1) one completed session's contribution."""
+        if not report:
+            return
+        changes = {"session_count": 1}
+        if urgency == "urgent":
+            changes["urgent_count"] = 1
+        else:
+            changes["monitor_count"] = 1
+        if report.get("stress_score") is not None:
+            changes["stress_sum"] = report["stress_score"]
+            changes["stress_count"] = 1
+        if report.get("attention_score") is not None:
+            changes["attention_sum"] = report["attention_score"]
+            changes["attention_count"] = 1
+        if report.get("impulsivity") in IMPULSIVITY_FIELDS:
+            changes[IMPULSIVITY_FIELDS[report["impulsivity"]]] = 1
+
+        for bucket in BUCKETS:
+            start = bucket_start(bucket, created_at.date())
+            for participant in ("", participant_id):
+                delta = self._deltas[(bucket, start, participant)]
+                for field, value in changes.items():
+                    delta[field] += sign * value
+
+    def flush(self, db: Session):
+        """
+        Applies the accumulated changes as increments done by the database (col = col + delta),
+        never read-modify-write in Python, so concurrent writers can't overwrite each other's counts.
+        """
+        if not self._deltas:
+            return
+        # Sorted, so concurrent writers lock rows in the same order
+        rows = [
+            {**dict(zip(ROLLUP_KEYS, key)), **{field: delta.get(field, 0) for field in ROLLUP_FIELDS}}
+            for key, delta in sorted(self._deltas.items())
+        ]
+        self._deltas.clear()
+
+        dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(TrendRollup)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=ROLLUP_KEYS,
+                set_={field: getattr(TrendRollup, field) + stmt.excluded[field] for field in ROLLUP_FIELDS},
+            )
+            db.exec(stmt, params=rows)
+            return
+
+        # Other databases: increment in place, inserting the rows that don't exist yet
+        for row in rows:
+            result = db.exec(
+                update(TrendRollup)
+                .where(*(getattr(TrendRollup, key) == row[key] for key in ROLLUP_KEYS))
+                .values({field: getattr(TrendRollup, field) + row[field] for field in ROLLUP_FIELDS})
+            )
+            if result.rowcount == 0:
+                db.add(TrendRollup(**row))
+        db.flush()
+
+def record_session_change(db: Session, session: DBSession, old_report: Optional[Dict[str, Any]], old_urgency: str):
+    """Moves a session's rollup contribution from its previous report/urgency to its current one."""
+    deltas = TrendDeltas()
+    deltas.add(session.created_at, session.participant_id, old_urgency, old_report, sign=-1)
+    deltas.add(session.created_at, session.participant_id, session.urgency, session.report)
+    deltas.flush(db)
+
+def rebuild_rollups(db: Session, chunk_size: int = 1000):
+    """Recomputes every rollup from the stored reports, e.g. after a bulk re-score."""
+    db.exec(delete(TrendRollup))
+    deltas = TrendDeltas()
+    rows = db.exec(
+        select(DBSession.created_at, DBSession.participant_id, DBSession.urgency, DBSession.report)
+        .where(DBSession.report.is_not(None))
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in rows:
+        deltas.add(row.created_at, row.participant_id, row.urgency, row.report)
+    deltas.flush(db)
+    db.commit()
+
+def query_trends(
+    db: Session,
+    bucket: str = "week",
+    participant_id: str = "",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    query = select(TrendRollup).where(TrendRollup.bucket == bucket, TrendRollup.participant_id == participant_id)
+    if since:
+        query = query.where(TrendRollup.bucket_start >= bucket_start(bucket, since))
+    if until:
+        query = query.where(TrendRollup.bucket_start <= until)
+    rollups = db.exec(query.order_by(TrendRollup.bucket_start)).all()
+    return [
+        {
+            "bucket_start": r.bucket_start,
+            "sessions": r.session_count,
+            "urgency": {"urgent": r.urgent_count, "monitor": r.monitor_count},
+            "mean_stress": r.stress_sum / r.stress_count if r.stress_count else None,
+            "mean_attention": r.attention_sum / r.attention_count if r.attention_count else None,
+            "impulsivity": {label: getattr(r, field) for label, field in IMPULSIVITY_FIELDS.items()},
+        }
+        for r in rollups
+        if r.session_count
+    ]
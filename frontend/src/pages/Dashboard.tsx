@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import { motion } from "framer-motion";
-import { ArrowLeft, Download, AlertCircle } from "lucide-react";
+import { ArrowLeft, Download, AlertCircle, Eye } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import {
   Table,
@@ -41,6 +41,47 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchSessions();
+
+    // Pushed updates instead of polling; EventSource reconnects and resumes on its own.
+    // Events carry a compact summary that is merged into the list, so a burst of events
+    // (e.g. a bulk ingest) doesn't make every open dashboard re-fetch it.
+    const events = new EventSource("http://localhost:8000/api/events");
+    const merge = (event: Event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      if (!data.session_id) return;
+      const update: Partial<Session> = {
+        id: data.session_id,
+        participant_id: data.participant_id,
+        source: data.source,
+        urgency: data.urgency,
+        created_at: data.created_at,
+        stress_score: data.stress_score ?? undefined,
+        attention_score: data.attention_score ?? undefined,
+      };
+      setSessions((current) => {
+        const index = current.findIndex((s) => s.id === data.session_id);
+        if (index === -1) return [update as Session, ...current];
+        const next = [...current];
+        next[index] = { ...current[index], ...update };
+        return next;
+      });
+    };
+    events.addEventListener("created", merge);
+    events.addEventListener("completed", merge);
+    // Missed events that can't be replayed: only then re-fetch the list
+    events.addEventListener("reset", () => fetchSessions());
+    events.addEventListener("escalated", (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      toast({
+        title: "Urgent session flagged",
+        description: data.participant_id
+          ? `Participant ${data.participant_id} needs review.`
+          : "A chat was flagged for immediate review.",
+        variant: "destructive",
+      });
+      merge(event);
+    });
+    return () => events.close();
   }, []);
 
   const fetchSessions = async () => {
@@ -101,6 +142,13 @@ const Dashboard = () => {
     }
   };
 
+  const handlePreviewReport = (sessionId: string) => {
+    window.open(
+      `http://localhost:8000/api/session/${sessionId}/report.html`,
+      "_blank"
+    );
+  };
+
   const handleDownloadPDF = async (sessionId: string) => {
     try {
       const response = await fetch(
@@ -296,6 +344,15 @@ const Dashboard = () => {
                 </div>
               )}
 
+              <Button
+                variant="outline"
+                onClick={() => handlePreviewReport(selectedSession.id)}
+                className="w-full rounded-2xl"
+              >
+                <Eye className="w-4 h-4 mr-2" />
+                Preview Report
+              </Button>
+
               <Button
                 onClick={() => handleDownloadPDF(selectedSession.id)}
                 className="w-full btn-gradient rounded-2xl"
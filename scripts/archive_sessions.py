@@ -0,0 +1,51 @@
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+# Add parent directory to path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Session as DBSession
+from backend.database import engine, create_db_and_tables
+from backend.raw_data import ARCHIVE_CODEC, RAW_DATA_HOT_DAYS, archive_sessions
+
+def main():
+    parser = argparse.ArgumentParser(description="Move the raw data of old sessions to compressed archive storage.")
+    parser.add_argument("--older-than-days", type=int, default=RAW_DATA_HOT_DAYS,
+                        help=f"archive sessions created more than this many days ago (default: {RAW_DATA_HOT_DAYS})")
+    parser.add_argument("--codec", choices=["zlib", "zstd"], default=ARCHIVE_CODEC,
+                        help="compression for archived data; zstd needs the zstandard package")
+    parser.add_argument("--chunk-size", type=int, default=500, help="sessions archived per commit")
+    parser.add_argument("--dry-run", action="store_true", help="only count the sessions that would be archived")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM afterwards so SQLite returns the freed pages to the filesystem")
+    args = parser.parse_args()
+
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+    create_db_and_tables()
+    with Session(engine) as db:
+        if args.dry_run:
+            count = db.exec(
+                select(func.count())
+                .select_from(DBSession)
+                .where(DBSession.created_at < cutoff, DBSession.raw_data_archived_at.is_(None))
+            ).one()
+            print(f"{count} sessions created before {cutoff:%Y-%m-%d} would be archived.")
+            return
+        total = archive_sessions(db, cutoff, args.codec, args.chunk_size,
+                                 progress=lambda n: print(f"Archived {n} sessions..."))
+
+    if args.vacuum:
+        if engine.dialect.name != "sqlite":
+            print("--vacuum only applies to SQLite, skipping.")
+        else:
+            print("Vacuuming database...")
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.exec_driver_sql("VACUUM")
+    print(f"Done! Archived the raw data of {total} sessions created before {cutoff:%Y-%m-%d}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+# Benchmarks run against a throwaway database and the offline LLM stand-in unless told otherwise;
+# this has to happen before the backend modules read their configuration
+parser = argparse.ArgumentParser(description="Seed synthetic sessions and load-test the TeenCare API.")
+parser.add_argument("--sessions", type=int, default=5000, help="synthetic sessions to seed before the run")
+parser.add_argument("--requests", type=int, default=2000, help="total requests to send")
+parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+parser.add_argument("--mix", default="llm=3,session=2,sessions=3,complete=2,export_pdf=1",
+                    help="relative weight of each endpoint")
+parser.add_argument("--llm-latency-ms", type=float, default=800, help="mean fake Gemini latency")
+parser.add_argument("--llm-jitter-ms", type=float, default=200, help="standard deviation of the fake latency")
+parser.add_argument("--llm-error-rate", type=float, default=0.02, help="fraction of fake Gemini calls that fail")
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--database-url", help="database to seed and benchmark (default: a temporary SQLite file)")
+parser.add_argument("--base-url", help="benchmark a running server instead of the app in-process "
+                                       "(start it with LLM_BACKEND=fake to use the fake model)")
+parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="teencare-bench-")
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+os.environ.setdefault("DB_PROFILE", "production")
+os.environ.setdefault("PDF_CACHE_DIR", os.path.join(workdir, "pdf_cache"))
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+os.environ["FAKE_LLM_JITTER_MS"] = str(args.llm_jitter_ms)
+os.environ["FAKE_LLM_ERROR_RATE"] = str(args.llm_error_rate)
+os.environ["FAKE_LLM_SEED"] = str(args.seed)
+
+import httpx
+from sqlmodel import Session, insert, select
+
+# Add parent directory to path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.models import Session as DBSession, SessionTelemetry
+from backend.raw_data import pack_session
+from backend.database import engine, create_db_and_tables
+from backend.timeline import rebuild_timelines
+from backend.trends import TrendDeltas
+from generate_demo_sessions import create_synthetic_session
+
+CHAT_MESSAGES = [
+    "hi",
+    "it was rough",
+    "school exams are stressing me out",
+    "I haven't been sleeping much",
+    "my friends have been kind of distant",
+    "I guess I'm okay, just tired",
+    "done",
+]
+
+def seed_sessions(count: int, batch_size: int = 1000) -> List[str]:
+    """Inserts `count` synthetic sessions (already scored) and returns their ids."""
+    random.seed(args.seed)
+    ids = []
+    with Session(engine) as db:
+        for start in range(0, count, batch_size):
+            deltas = TrendDeltas()
+            rows, telemetry_rows = [], []
+            for i in range(start, min(start + batch_size, count)):
+                session = create_synthetic_session(i)
+                deltas.add(session.created_at, session.participant_id, session.urgency, session.report)
+                telemetry = pack_session(session)
+                if telemetry is not None:
+                    telemetry_rows.append(telemetry.model_dump())
+                rows.append(session.model_dump())
+            db.exec(insert(DBSession), params=rows)
+            if telemetry_rows:
+                db.exec(insert(SessionTelemetry), params=telemetry_rows)
+            deltas.flush(db)
+            db.commit()
+            ids.extend(row["id"] for row in rows)
+        rebuild_timelines(db)
+        db.commit()
+    return ids
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, session_ids: List[str], mix: Dict[str, float]):
+        self.client = client
+        self.session_ids = session_ids
+        self.created_ids: List[str] = []
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.remaining = 0
+
+    async def run(self, total: int, concurrency: int) -> float:
+        self.remaining = total
+        started = time.perf_counter()
+        await asyncio.gather(*(self.client_loop(random.Random(args.seed + n)) for n in range(concurrency)))
+        return time.perf_counter() - started
+
+    async def client_loop(self, rng: random.Random):
+        conversation_id = None
+        turn = 0
+        while self.remaining > 0:
+            self.remaining -= 1
+            endpoint = rng.choices(self.endpoints, self.weights)[0]
+            if endpoint == "llm":
+                if turn == len(CHAT_MESSAGES):
+                    conversation_id, turn = None, 0
+                payload = {"message": CHAT_MESSAGES[turn]}
+                if conversation_id:
+                    payload["conversation_id"] = conversation_id
+                turn += 1
+                response = await self.timed(endpoint, "POST", "/api/llm", json=payload)
+                if response is not None and response.status_code == 200:
+                    conversation_id = response.json()["conversation_id"]
+                else:
+                    conversation_id, turn = None, 0
+            elif endpoint == "session":
+                session = create_synthetic_session(rng.randrange(1_000_000))
+                response = await self.timed(endpoint, "POST", "/api/session", json={
+                    "participant_id": session.participant_id,
+                    "source": session.source,
+                    "meta": session.meta,
+                    "raw_data": session.raw_data,
+                })
+                if response is not None and response.status_code == 200:
+                    self.created_ids.append(response.json()["session_id"])
+            elif endpoint == "sessions":
+                skip = rng.randrange(max(1, len(self.session_ids) - 20))
+                await self.timed(endpoint, "GET", "/api/sessions", params={"skip": skip, "limit": 20})
+            elif endpoint == "complete":
+                # Prefer sessions created during the run, which still have a scoring job in flight
+                pool = self.created_ids if self.created_ids and rng.random() < 0.5 else self.session_ids
+                await self.timed(endpoint, "POST", f"/api/session/{rng.choice(pool)}/complete")
+            elif endpoint == "export_pdf":
+                await self.timed(endpoint, "GET", f"/api/session/{rng.choice(self.session_ids)}/export/pdf")
+
+    async def timed(self, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            print(f"{endpoint}: {e}")
+            response = None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        # 202 from /complete means "still scoring" and is a normal answer
+        if response is None or response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        results = {}
+        for endpoint in self.endpoints:
+            values = sorted(self.latencies[endpoint])
+            if not values:
+                continue
+            results[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "throughput_rps": len(values) / elapsed,
+            }
+        return results
+
+def print_report(results: Dict[str, Dict[str, float]], elapsed: float):
+    print(f"\n{'endpoint':<12}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for endpoint, r in results.items():
+        print(f"{endpoint:<12}{r['requests']:>10}{r['errors']:>8}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['throughput_rps']:>10.1f}")
+    total = sum(r["requests"] for r in results.values())
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+
+async def run_benchmark(session_ids: List[str], mix: Dict[str, float]):
+    timeout = httpx.Timeout(120)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits)
+        lifespan = None
+    else:
+        from backend.main import app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://benchmark", timeout=timeout, limits=limits,
+        )
+        # ASGITransport doesn't send lifespan events; run startup/shutdown (scoring workers etc.) ourselves
+        lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            test = LoadTest(client, session_ids, mix)
+            elapsed = await test.run(args.requests, args.concurrency)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    results = test.report(elapsed)
+    print_report(results, elapsed)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"settings": vars(args), "elapsed_seconds": elapsed, "endpoints": results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+def main():
+    mix = {}
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+
+    print(f"Database: {os.environ['DATABASE_URL']}")
+    create_db_and_tables()
+    if args.base_url and args.database_url is None:
+        print("--base-url needs --database-url pointing at the server's database")
+        sys.exit(2)
+
+    with Session(engine) as db:
+        existing = db.exec(select(DBSession.id).limit(args.sessions)).all()
+    if len(existing) < args.sessions:
+        print(f"Seeding {args.sessions - len(existing)} synthetic sessions...")
+        started = time.perf_counter()
+        existing += seed_sessions(args.sessions - len(existing))
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    print(f"Sending {args.requests} requests with {args.concurrency} concurrent clients...")
+    asyncio.run(run_benchmark(list(existing), mix))
+
+if __name__ == "__main__":
+    main()
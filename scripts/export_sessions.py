@@ -0,0 +1,55 @@
+import sys
+import os
+import argparse
+from datetime import datetime
+from sqlmodel import Session
+
+# Add parent directory to path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import engine, create_db_and_tables
+from backend.research_export import EXPORT_FORMATS, iter_csv, iter_export_chunks, iter_parquet, parquet_available
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every session as one flat row, for research.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", "-o", help="file to write (default: CSV to stdout)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only sessions created at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="only sessions created before this time")
+    parser.add_argument("--source", choices=["quiz", "chat", "both"], help="only sessions of this source")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows fetched and written at a time")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        if not parquet_available():
+            sys.exit("Parquet export needs pyarrow: pip install pyarrow")
+        if not args.output:
+            sys.exit("--output is required for Parquet")
+
+    create_db_and_tables()
+    rows = 0
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    with Session(engine) as db:
+        chunks = counted(iter_export_chunks(db, args.since, args.until, args.source, args.chunk_size))
+        if args.format == "parquet":
+            with open(args.output, "wb") as f:
+                for data in iter_parquet(chunks):
+                    f.write(data)
+        else:
+            f = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+            try:
+                for text in iter_csv(chunks):
+                    f.write(text)
+            finally:
+                if args.output:
+                    f.close()
+    # Keep stdout clean for piped CSV
+    print(f"Exported {rows} sessions.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
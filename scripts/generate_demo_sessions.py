@@ -11,6 +11,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend.models import Session as DBSession
 from backend.database import engine, create_db_and_tables
 from backend.scoring import generate_summary
+from backend.raw_data import pack_session
+from backend.timeline import rebuild_timelines
+from backend.trends import TrendDeltas
 
 def create_synthetic_session(index: int):
     source = random.choice(["chat", "quiz", "both"])
@@ -91,7 +94,7 @@ def create_synthetic_session(index: int):
         "source": source,
         "raw_data": raw_data
     })
-    session.report = summary
+    session.apply_report(summary)
     
     # Urgency
     if summary.get("stress_label") == "High" or summary.get("emotional_bias") == "Negative":
@@ -107,9 +110,16 @@ def main():
     
     print("Generating 20 synthetic sessions...")
     with Session(engine) as db:
+        deltas = TrendDeltas()
         for i in range(20):
             session = create_synthetic_session(i)
             db.add(session)
+            telemetry = pack_session(session)
+            if telemetry is not None:
+                db.add(telemetry)
+            deltas.add(session.created_at, session.participant_id, session.urgency, session.report)
+        deltas.flush(db)
+        rebuild_timelines(db)
         db.commit()
     
     print("Done! Database populated.")
@@ -0,0 +1,76 @@
+import sys
+import os
+import argparse
+import re
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy optional subsystems that must only be imported on first use
+LAZY_MODULES = ["weasyprint", "google.generativeai"]
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+# __import__ rather than importlib.import_module, which bypasses -X importtime for the target itself
+CHILD = """
+import resource, sys
+__import__(sys.argv[1])
+print("RSS_KB", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print("MODULES", " ".join(sorted(sys.modules)))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Report how long importing the app takes, per package and module.")
+    parser.add_argument("--module", default="backend.main", help="module to import (default: backend.main)")
+    parser.add_argument("--top", type=int, default=15, help="rows to show per table")
+    parser.add_argument("--check-lazy", action="store_true",
+                        help=f"exit with status 1 if any of {', '.join(LAZY_MODULES)} is imported at startup")
+    args = parser.parse_args()
+
+    # A fresh interpreter, so nothing is cached in sys.modules
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, args.module],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(result.returncode)
+
+    by_package = defaultdict(int)
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), len(match[3]), match[4]
+        by_package[name.split(".")[0]] += self_us
+        modules.append((cumulative_us, self_us, indent, name))
+
+    rss_kb = 0
+    loaded = set()
+    for line in result.stdout.splitlines():
+        if line.startswith("RSS_KB "):
+            rss_kb = int(line.split()[1])
+        elif line.startswith("MODULES "):
+            loaded = set(line.split()[1:])
+
+    total_us = sum(by_package.values())
+    print(f"Importing {args.module}: {total_us / 1000:.0f} ms, peak RSS {rss_kb / 1024:.1f} MB\n")
+
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{self_us / 1000:>10.1f}{self_us / total_us:>8.1%}")
+
+    print(f"\n{'module (top-level imports)':<48}{'cumulative ms':>14}")
+    top_level = [m for m in modules if m[2] == 0 or m[3].startswith("backend")]
+    for cumulative_us, _, _, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"{name:<48}{cumulative_us / 1000:>14.1f}")
+
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    print(f"\nLazy subsystems imported at startup: {', '.join(eager) if eager else 'none'}")
+    if args.check_lazy and eager:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import sys
+import os
+import argparse
+from sqlmodel import Session, select
+
+# Add parent directory to path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Session as DBSession
+from backend.database import engine, create_db_and_tables
+from backend.extraction import (
+    EXTRACTION_BATCH_SIZE, EXTRACTION_WORKERS, Checkpoint, needs_extraction, reextract_chats,
+)
+from backend.llm_service import get_gemini_model
+
+def count_pending(db: Session) -> int:
+    rows = db.exec(
+        select(DBSession.raw_data)
+        .where(DBSession.source.in_(["chat", "both"]), DBSession.raw_data_archived_at.is_(None))
+        .execution_options(yield_per=1000)
+    )
+    return sum(1 for raw_data in rows if needs_extraction(raw_data))
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill in missing extracted fields of stored chat sessions and re-score them.")
+    parser.add_argument("--checkpoint", default="reextract_checkpoint.json",
+                        help="progress file; an interrupted run resumes from it")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the beginning")
+    parser.add_argument("--batch-size", type=int, default=EXTRACTION_BATCH_SIZE, help="transcripts per LLM request")
+    parser.add_argument("--workers", type=int, default=EXTRACTION_WORKERS, help="LLM requests in flight at once")
+    parser.add_argument("--chunk-size", type=int, default=200, help="sessions scanned and committed at a time")
+    parser.add_argument("--limit", type=int, help="stop after updating this many sessions")
+    parser.add_argument("--local", action="store_true", help="use the local keyword extractor even if an API key is set")
+    parser.add_argument("--dry-run", action="store_true", help="only count the sessions that need extraction")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        if args.dry_run:
+            print(f"{count_pending(db)} chat sessions need extraction.")
+            return
+
+        if args.restart and os.path.exists(args.checkpoint):
+            os.remove(args.checkpoint)
+        checkpoint = Checkpoint(args.checkpoint)
+        if checkpoint.last_id:
+            print(f"Resuming after session {checkpoint.last_id}...")
+        use_model = not args.local and get_gemini_model() is not None
+        print(f"Extracting with {'Gemini' if use_model else 'the local extractor'}...")
+
+        counts = reextract_chats(
+            db, checkpoint, args.chunk_size, args.batch_size, args.workers, use_model, args.limit,
+            progress=lambda c: print(f"Scanned {c['scanned']} sessions, updated {c['model'] + c['local']}..."),
+        )
+    print(f"Done! Updated {counts['model'] + counts['local']} sessions "
+          f"({counts['model']} by the model, {counts['local']} locally) out of {counts['scanned']} scanned.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import os
+import argparse
+import math
+from sqlmodel import Session, select
+
+# Add parent directory to path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Session as DBSession
+from backend.database import engine, create_db_and_tables
+from backend.scoring import generate_summary
+from backend.batch_scoring import score_sessions, rescore_all_sessions
+from backend.raw_data import load_raw_data_many
+from backend.timeline import rebuild_timelines
+from backend.trends import rebuild_rollups
+
+def verify(db: Session, limit: int) -> int:
+    """Compares the batch scorer with generate_summary on up to `limit` sessions; returns mismatches."""
+    rows = db.exec(select(DBSession.id, DBSession.source, DBSession.raw_data).limit(limit)).all()
+    sessions = [{"source": r.source, "raw_data": raw} for r, raw in zip(rows, load_raw_data_many(db, rows))]
+    mismatches = 0
+    for row, session, batch in zip(rows, sessions, score_sessions(sessions)):
+        single = generate_summary(session)
+        same = single.keys() == batch.keys() and all(
+            math.isclose(single[k], batch[k], rel_tol=1e-12) if isinstance(single[k], float) else single[k] == batch[k]
+            for k in single
+        )
+        if not same:
+            mismatches += 1
+            print(f"Mismatch for session {row.id}: {single} != {batch}")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score every stored session with the current scoring rules.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="sessions loaded and written per batch")
+    parser.add_argument("--verify", type=int, metavar="N", default=0,
+                        help="only compare batch and per-session scoring on N sessions, without writing")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        if args.verify:
+            mismatches = verify(db, args.verify)
+            print(f"Verified batch scoring: {mismatches} mismatches")
+            sys.exit(1 if mismatches else 0)
+
+        total = rescore_all_sessions(db, args.chunk_size, progress=lambda n: print(f"Re-scored {n} sessions..."))
+        print("Rebuilding trend rollups...")
+        rebuild_rollups(db)
+        print("Rebuilding participant timelines...")
+        rebuild_timelines(db)
+        db.commit()
+    print(f"Done! Re-scored {total} sessions.")
+
+if __name__ == "__main__":
+    main()